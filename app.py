@@ -1,12 +1,11 @@
 # web programming frameworks
-from flask import Flask, render_template, request, redirect, url_for, send_file, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify, stream_with_context
 from dash import Dash, dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 
 # data processing
-import os, shutil
-import numpy as np
-import pandas as pd
+import os, shutil, tempfile, threading
+from urllib.parse import parse_qs
 from datetime import datetime
 
 # data plotting
@@ -14,41 +13,60 @@ import seaborn as sns
 import plotly.graph_objs as go
 
 # custom modules
-from modules.keyphrase_extraction import procesar_archivo
-from modules.seasonality_prediction import forecasting, generate_plots
-from modules.world_bank import indicators, get_country_data_for_indicator, plot_time_series, plot_heatmap
-from modules.whatsapp import preprocess_whatsapp_data, text_normalizer, sentiment_analysis, generate_wordcloud
+from modules.keyphrase_extraction import (procesar_ruta, get_ngram_counts, build_results, default_workers,
+                                         UploadTooLargeError, MAX_UPLOAD_BYTES)
+from modules.seasonality_prediction import forecast_file
+from modules.world_bank import (indicators, get_indicator_store, get_figure, prewarm_cache,
+                                export_formats, iter_export_frames, stream_export, serialize_values)
+from modules.whatsapp import (analyze_chat, sentiment_analysis, get_wordcloud, create_chat_session, get_chat_session,
+                              build_count_cube, filter_chat, messages_per_period, response_latency)
+from modules.nlp_resources import NLPResourceError, get_stopwords, require_resources, warm_up
+from modules.jobs import JobQueue
 
 # APPs
 app = Flask(__name__) # Initialize Flask app
+app.config['KEYPHRASE_MAX_UPLOAD_BYTES'] = int(os.environ.get('KEYPHRASE_MAX_UPLOAD_BYTES', MAX_UPLOAD_BYTES))
+# Requests with a bigger body are rejected with a 413 before it is read, whatever the route
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 200 * 1024 * 1024))
 dash_app = Dash(__name__, server=app, url_base_pathname='/dashboard/') # Initialize Dash app
 
-# CLEANING FOLDERS
-def remove_old_files(folder, files_to_remove=None):
-    """
-    Removes specific files and folders in a folder or all files and folders if not specified.
-    
-    :param folder: Folder from which files and folders will be removed.
-    :param files_to_remove: List of filenames to remove. If None, all files and folders will be removed.
-    """
-    if os.path.exists(folder):
-        for filename in os.listdir(folder):
-            file_path = os.path.join(folder, filename)
-            try:
-                if os.path.isfile(file_path):
-                    if files_to_remove and filename not in files_to_remove:
-                        continue
-                    os.remove(file_path)
-                    print(f"Deleted file: {file_path}")
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-                    print(f"Deleted folder: {file_path}")
-            except Exception as e:
-                print(f"Error deleting {file_path}: {e}")
-    else:
-        print(f"Folder does not exist: {folder}")
-remove_old_files('static/seasonality_prediction')
-remove_old_files('static/world_bank')
+# WARMING CACHES
+def warm_caches():
+    """Warms the caches of the serving process"""
+    # Load every World Bank indicator in the background so requests are served from the payload cache
+    threading.Thread(target=prewarm_cache, daemon=True).start()
+    # Load the NLTK tokenizer, stopwords and TextBlob lexicon once, instead of on every request
+    warm_up()
+
+# Job workers (started with forkserver) import this script again as '__mp_main__' when it is run directly; 
+# they must not start network threads or fetch the indicators again, and load their resources on their own
+if __name__ != '__mp_main__':
+    warm_caches()
+
+# BACKGROUND JOBS
+# Uploads are processed by worker processes (loaded with the NLP resources) while the page polls for the result;
+# job records are kept on disk so any app worker can answer the status and result of any job
+job_queue = JobQueue(initializer=warm_up, store_dir=os.environ.get('JOB_STORE_DIR', os.path.join('cache', 'jobs')))
+job_titles = {'keyphrase': 'Keyphrase Extraction', 'seasonality': 'Seasonality Prediction', 'whatsapp': 'WhatsApp'}
+
+# Room left in a request for the form fields and multipart boundaries around the uploaded file
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+def upload_too_large(max_bytes):
+    """Checks from the request headers, before the body is read, whether the upload exceeds 'max_bytes'"""
+    return request.content_length is not None and request.content_length > max_bytes + FORM_OVERHEAD_BYTES
+
+def save_upload(file):
+    """Saves an uploaded file to a temporary path, so a background job can read it"""
+    suffix = os.path.splitext(file.filename or '')[1]
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, 'wb') as f:
+        shutil.copyfileobj(file.stream, f)
+    return path
+
+def job_page(job_id, kind):
+    """Page shown while a job runs; it polls the job status and opens the result when it is ready"""
+    return render_template('job_status.html', job_id=job_id, title=job_titles[kind]), 202
 
 def delta_time():
     """"Updates the time since the last job was started"""
@@ -119,64 +137,75 @@ def keyphrase_extraction():
 @app.route('/keyphrase_extraction_process', methods=['POST'])
 def keyphrase_extraction_process():
     """Processes the uploaded file for keyphrase extraction"""
+    max_bytes = app.config['KEYPHRASE_MAX_UPLOAD_BYTES']
+    if upload_too_large(max_bytes):
+        return f"The file exceeds the maximum size of {max_bytes:,} bytes", 413
     file = request.files.get('file')
     num_tables = int(request.form.get('num_tables', 0))
     num_rows = int(request.form.get('num_rows', 0))
 
     if file:
         try:
-            data = file.read().decode('utf-8')
-            results = procesar_archivo(data, num_tables=num_tables, num_rows=num_rows)
-            return render_template('keyphrase_extraction.html', results=results)
-        except Exception as e:
-            print(f"Error processing file: {e}")
+            require_resources()
+        except NLPResourceError as e:
+            return str(e), 503
+        # The upload is decoded, split into sentences and counted in a background job
+        path = save_upload(file)
+        job_id = job_queue.submit(
+            'keyphrase', 
+            procesar_ruta, 
+            path, 
+            num_tables=num_tables, 
+            num_rows=num_rows, 
+            max_bytes=max_bytes, 
+            files=[path])
+        return job_page(job_id, 'keyphrase')
     return redirect(url_for('keyphrase_extraction'))
 
+@app.route('/keyphrase_extraction_api', methods=['POST'])
+def keyphrase_extraction_api():
+    """Returns the keyphrase extraction results of the uploaded file as JSON"""
+    max_bytes = app.config['KEYPHRASE_MAX_UPLOAD_BYTES']
+    if upload_too_large(max_bytes):
+        return jsonify({'error': f"The file exceeds the maximum size of {max_bytes:,} bytes"}), 413
+    file = request.files.get('file')
+    num_tables = int(request.form.get('num_tables', 5))
+    num_rows = int(request.form.get('num_rows', 5))
+
+    if not file:
+        return jsonify({'error': 'No file was uploaded'}), 400
+    try:
+        # Counts are cached by content hash, so repeated submissions skip the extraction
+        counter, content_hash = get_ngram_counts(
+            file.stream, 
+            max(num_tables, 1), 
+            workers=default_workers(request.content_length), 
+            max_bytes=max_bytes)
+        results = build_results(counter, num_tables, num_rows)
+    except UploadTooLargeError as e:
+        return jsonify({'error': str(e)}), 413
+    except NLPResourceError as e:
+        return jsonify({'error': str(e)}), 503
+
+    return jsonify({
+        'content_hash': content_hash,
+        'results': {name: table.to_dict(orient='records') for name, table in results.items()}
+    })
+
 # SEASONALITY PREDICTION
 @app.route('/seasonality_prediction', methods=['GET', 'POST'])
 def seasonality_prediction():
     """Route for seasonality prediction"""
     try:
-        existing_plots = []  # List to store the names of existing image files
         if request.method == 'POST':
             file = request.files.get('file')
             periodicity = int(request.form.get('periodicity'))
 
             if file:
-                try:
-                    serie = pd.read_excel(file)
-                    if serie.shape[1] == 1:
-
-                        col_name = serie.columns[0]
-                        
-                        forecasted_values_last_period = forecasting(
-                            serie[col_name].iloc[:-periodicity], 
-                            periodicity=periodicity)          
-                        
-                        forecasted_values_next_period = forecasting(
-                            serie[col_name], 
-                            periodicity=periodicity)
-                        
-                        generate_plots(
-                            serie[col_name],
-                            forecasted_values_last_period, 
-                            forecasted_values_next_period, 
-                            periodicity)
-
-                        # Get the list of existing image file names
-                        for filename in ['original_data.png', 'all_periods_data.png', 'historic_and_prediction_data.png']:
-                            if os.path.exists(os.path.join('static', 'seasonality_prediction', filename)):
-                                existing_plots.append(filename)
-
-                        return render_template('seasonality_prediction.html', 
-                                               forecast=forecasted_values_next_period, 
-                                               existing_plots=existing_plots, 
-                                               enumerate=enumerate)
-                    else:
-                        return "The Excel file has more than one column"
-                except Exception as e:
-                    print(f"Error processing file: {e}")
-                    return render_template('seasonality_prediction_error.html')
+                # Every numeric column of the workbook is forecast and the first one plotted in a background job
+                path = save_upload(file)
+                job_id = job_queue.submit('seasonality', forecast_file, path, periodicity, files=[path])
+                return job_page(job_id, 'seasonality')
         return render_template('seasonality_prediction.html')
     except Exception as e:
         print(f"Error: {e}")
@@ -193,19 +222,12 @@ def fetch_options():
     """Fetches country or year options for a World Bank indicator"""
     indicator_id = request.args.get('indicator')
     type = request.args.get('type')
-    data = get_country_data_for_indicator(indicator_id)
+    store = get_indicator_store(indicator_id)
 
-    if not data:
+    if not store:
         return jsonify([])
 
-    if type == 'country':
-        options = sorted({entry['country']['value'] for entry in data})
-    elif type == 'year':
-        options = sorted({entry['date'] for entry in data}, reverse=True)
-    else:
-        options = []
-
-    return jsonify(options)
+    return jsonify(store.options(type))
 
 @app.route('/fetch_data')
 def fetch_data():
@@ -213,132 +235,68 @@ def fetch_data():
     indicator_id = request.args.get('indicator')
     type = request.args.get('type')
     option = request.args.get('option')
-    data = get_country_data_for_indicator(indicator_id)
+    store = get_indicator_store(indicator_id)
 
-    if not data:
+    if not store:
         return jsonify([])
 
-    if type == 'country':
-        filtered_data = [entry for entry in data if entry['country']['value'] == option]
-    elif type == 'year':
-        filtered_data = [entry for entry in data if entry['date'] == option]
-    else:
-        filtered_data = []
-
-    df = pd.DataFrame([
-        (entry['country']['value'], entry['date'], entry['value'])
-        for entry in filtered_data
-    ], columns=['COUNTRY', 'DATE', 'VALUE'])
-
-    # Sort by 'COUNTRY' in ascending order and by 'DATE' in descending order
-    df = df.sort_values(by=['COUNTRY', 'DATE'], ascending=[True, False])
-    df.drop_duplicates(inplace=True)
-    print(df.head())
+    # Rows come back sorted by 'COUNTRY' in ascending order and by 'DATE' in descending order
+    df = store.query(type, option)[['COUNTRY', 'DATE', 'VALUE']]
 
-    return df.to_dict(orient='records')
+    return df.astype({'COUNTRY': str}).assign(VALUE=serialize_values(df['VALUE'])).to_dict(orient='records')
 
 @app.route('/download_csv')
 def download_csv():
-    """Generates and downloads a CSV file with the filtered data"""
-    indicator_id = request.args.get('indicator')
+    """
+    Streams the filtered data as CSV, gzip-compressed CSV or Parquet ('format' parameter). The 'indicator' 
+    and 'option' parameters may be repeated to export several indicators and countries/years at once.
+    """
+    indicator_ids = request.args.getlist('indicator')
     type = request.args.get('type')
-    option = request.args.get('option')
-    data = get_country_data_for_indicator(indicator_id)
+    options = request.args.getlist('option')
+    format = request.args.get('format', 'csv')
 
-    if not data:
+    if format not in export_formats:
+        return f"Unsupported format: {format}", 400
+    if not indicator_ids or not any(get_indicator_store(indicator_id) for indicator_id in indicator_ids):
         return "No data available"
 
-    if type == 'country':
-        filtered_data = [entry for entry in data if entry['country']['value'] == option]
-    elif type == 'year':
-        filtered_data = [entry for entry in data if entry['date'] == option]
-    else:
-        filtered_data = []
-
-    df = pd.DataFrame([
-        (entry['country']['value'], entry['date'], entry['value'])
-        for entry in filtered_data
-    ], columns=['COUNTRY', 'DATE', 'VALUE'])
-
-    # Sort by 'COUNTRY' in ascending order and by 'DATE' in descending order
-    df = df.sort_values(by=['COUNTRY', 'DATE'], ascending=[True, False])
-
-    # Create the CSV file
-    downloads_folder = os.path.join(os.path.expanduser('~'), 'Downloads')
-    os.makedirs(downloads_folder, exist_ok=True)
-    csv_path = os.path.join(downloads_folder, 'data.csv')
-    df.to_csv(csv_path, index=False)
-
-    # Send the CSV file to the client
-    return send_file(csv_path, mimetype='text/csv', as_attachment=True, download_name='data.csv')
+    mimetype, extension = export_formats[format]
+    chunks = stream_export(iter_export_frames(indicator_ids, type, options), format=format)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=data.{extension}'})
 
 @app.route('/interactive_graph', methods=['POST'])
 def interactive_graph():
-    """Generates an interactive graph based on the selected indicator, type, and option"""
+    """Returns the interactive graph of the selected indicator, type, and option as a JSON figure"""
     indicator = request.form.get('indicator')
     type = request.form.get('type')
     option = request.form.get('option')
 
-    # Get data for the selected country or year
-    data = get_country_data_for_indicator(indicator)
+    if type not in ('country', 'year'):
+        return "Invalid type", 400
 
-    # Filter based on the selected type (country or year)
-    if type == 'country':
-        filtered_data = [entry for entry in data if entry['country']['value'] == option]
-    elif type == 'year':
-        filtered_data = [entry for entry in data if entry['date'] == option]
-    else:
-        return "Invalid type"
+    # Identical selections are served from the figure cache
+    figure = get_figure(indicator, type, option)
+    if figure is None:
+        return "No data available", 404
 
-    df = pd.DataFrame([
-        (entry['countryiso3code'], entry['country']['value'], entry['date'], entry['value'])
-        for entry in filtered_data
-    ], columns=['ISO_CODE', 'COUNTRY', 'DATE', 'VALUE'])
-
-    # Sort by 'COUNTRY' in ascending order and by 'DATE' in descending order
-    df = df.sort_values(by=['COUNTRY', 'DATE'], ascending=[True, False])
-
-    # Execute the appropriate graph function
-    if type == 'country':
-        plot_time_series(df, title=option)
-    elif type == 'year':
-        plot_heatmap(df)
-
-    return "Interactive graph generated."
+    return Response(figure, mimetype='application/json')
 
 # WHATSAPP
-dash_app.layout = html.Div([
-    html.H1("Dashboard will be displayed after data upload.".capitalize()),
-    html.P("Please upload a file to view the dashboard.".capitalize()),
-    dcc.Dropdown(
-        id='issuer-dropdown',
-        options=[],  # This will be dynamically populated
-        value=None
-    ),
-    html.Div(id='general-charts', style={'width': '100%', 'display': 'inline-block'}),
-    html.Div([
-        dcc.Graph(id='hour-chart'),
-        dcc.Graph(id='dow-chart'),
-        dcc.Graph(id='dom-chart'),
-        dcc.Graph(id='month-chart'),
-        dcc.Graph(id='sentiment-analysis'),
-        html.Img(id='wordcloud', style={'width': '100%', 'height': 'auto'})
-    ])
-])
-
-def create_dash_layout(df, days_of_the_week, months):
-    if df.empty:
-        return html.Div([
-            html.H1("Cantidad de Mensajes por Emisor"),
-            html.P("No data available.")
-        ])
+def create_dash_layout():
+    """Dashboard of an uploaded chat; the upload is identified by the 'session' parameter of the URL"""
     return html.Div([
-        html.H1("choose an issuer".capitalize()),
+        dcc.Location(id='url', refresh=False),
+        html.H1("Dashboard will be displayed after data upload.".capitalize(), id='dashboard-title'),
         dcc.Dropdown(
             id='issuer-dropdown',
-            options=[{'label': issuer, 'value': issuer} for issuer in df['ISSUER'].unique()],
-            value=df['ISSUER'].unique()[0] if not df.empty else None
+            options=[],  # Populated from the session of the URL
+            value=None
         ),
+        dcc.DatePickerRange(id='date-range', display_format='DD/MM/YYYY', clearable=True),
         html.Div(id='general-charts', style={'width': '100%', 'display': 'inline-block'}),
         html.Div([
             html.Div(dcc.Graph(id='hour-chart'), style={'width': '48%', 'display': 'inline-block'}),
@@ -346,10 +304,18 @@ def create_dash_layout(df, days_of_the_week, months):
             html.Div(dcc.Graph(id='dom-chart'), style={'width': '48%', 'display': 'inline-block'}),
             html.Div(dcc.Graph(id='month-chart'), style={'width': '48%', 'display': 'inline-block'}),
             html.Div(dcc.Graph(id='sentiment-analysis'), style={'width': '48%', 'display': 'inline-block'}),
-            html.Div(html.Img(id='wordcloud', style={'width': '100%', 'height': 'auto'}), style={'width': '48%', 'display': 'inline-block', 'vertical-align': 'top'})
+            html.Div(html.Img(id='wordcloud', style={'width': '100%', 'height': 'auto'}), style={'width': '48%', 'display': 'inline-block', 'vertical-align': 'top'}),
+            html.Div(dcc.Graph(id='timeline-chart'), style={'width': '48%', 'display': 'inline-block'}),
+            html.Div(dcc.Graph(id='latency-chart'), style={'width': '48%', 'display': 'inline-block'})
         ])
     ])
 
+dash_app.layout = create_dash_layout()
+
+def session_id_from(search):
+    """Reads the session id from the query string of the dashboard URL"""
+    return parse_qs((search or '').lstrip('?')).get('session', [None])[0]
+
 days_of_the_week = {0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday', 4: 'Friday',
                     5: 'Saturday', 6: 'Sunday'}
 months = {1: 'January', 2: 'February', 3: 'March', 4: 'April', 5: 'May', 6: 'June',
@@ -358,30 +324,54 @@ months = {1: 'January', 2: 'February', 3: 'March', 4: 'April', 5: 'May', 6: 'Jun
 
 @app.route('/whatsapp', methods=['GET', 'POST'])
 def whatsapp():
-    global df, file_content, language
     if request.method == 'POST':
         file = request.files.get('file')
         language = request.form.get('selected_language')
         print('Selected language:', language)
         
         if file:
-            file_content = preprocess_whatsapp_data(file)
-
-            df = file_content.groupby(['ISSUER', 'HOUR', 'dow', 'dom', 'month'])['MESSAGE'].count().reset_index()
-            df_ = file_content.groupby(['HOUR', 'dow', 'dom', 'month'])['MESSAGE'].count().reset_index()
-            df_['ISSUER'] = 'GENERAL'
-            df = pd.concat([df, df_])
-
-            print("Issuers: ", df['ISSUER'].unique())  # Verificar el contenido procesado
-            
-            # Update Dash app layout
-            dash_app.layout = create_dash_layout(df, days_of_the_week, months)
-            
-            # Redirigir al dashboard
-            return redirect('/dashboard/')
+            try:
+                require_resources()
+            except NLPResourceError as e:
+                return str(e), 503
+            if not language:
+                return "Please select the language of the chat", 400
+            try:
+                get_stopwords(language)  # The chosen language must have a stopword list
+            except NLPResourceError as e:
+                return str(e), 400
+            # The chat is parsed, scored and counted once in a background job; each upload gets its own 
+            # session, so uploads never replace each other's dashboard
+            path = save_upload(file)
+            job_id = job_queue.submit(
+                'whatsapp', 
+                analyze_chat, 
+                path, 
+                language, 
+                files=[path], 
+                on_done=create_chat_session)
+            return job_page(job_id, 'whatsapp')
         
     return render_template("whatsapp.html")
 
+@dash_app.callback( # Dash callback
+    [Output('dashboard-title', 'children'),
+     Output('issuer-dropdown', 'options'),
+     Output('issuer-dropdown', 'value'),
+     Output('date-range', 'min_date_allowed'),
+     Output('date-range', 'max_date_allowed')],
+    [Input('url', 'search')]
+)
+def load_session(search):
+    session = get_chat_session(session_id_from(search))
+    if session is None or not session['cube']:
+        return ("No data available. Please upload a file to view the dashboard.", [], None, None, None)
+
+    issuers = list(session['cube'])
+    dates = session['chat'].index  # Sorted, so the first and last messages bound the date range
+    return ("choose an issuer".capitalize(), [{'label': issuer, 'value': issuer} for issuer in issuers], issuers[0],
+            dates[0].date(), dates[-1].date())
+
 @dash_app.callback( # Dash callback
     [Output('general-charts', 'children'),
      Output('hour-chart', 'figure'),
@@ -389,16 +379,30 @@ def whatsapp():
      Output('dom-chart', 'figure'),
      Output('month-chart', 'figure'),
      Output('sentiment-analysis', 'figure'),
-     Output('wordcloud', 'src')],
-    [Input('issuer-dropdown', 'value')]
+     Output('wordcloud', 'src'),
+     Output('timeline-chart', 'figure'),
+     Output('latency-chart', 'figure')],
+    [Input('issuer-dropdown', 'value'),
+     Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')],
+    [State('url', 'search')]
 )
-def update_charts(selected_issuer):
-    # Ensure df is available globally or adjust logic to access updated df
-    if selected_issuer is None:
-        return (html.P("No data available."), {}, {}, {}, {}, {}, '')
+def update_charts(selected_issuer, start_date, end_date, search):
+    # The data of the upload is looked up by session, so any worker can serve the callback
+    session = get_chat_session(session_id_from(search))
+    if selected_issuer is None or session is None:
+        return (html.P("No data available."), {}, {}, {}, {}, {}, '', {}, {})
     
-    if df.empty:
-        return (html.P("No data available."), {}, {}, {}, {}, {}, '')
+    cube, file_content = session['cube'], session['chat']
+    if selected_issuer not in cube:
+        return (html.P("No data available."), {}, {}, {}, {}, {}, '', {}, {})
+
+    if start_date or end_date:
+        # Messages of the date range, sliced by binary search on the time index, and their counts
+        file_content = filter_chat(file_content, start_date, end_date)
+        cube = build_count_cube(file_content)
+        if selected_issuer not in cube:
+            return (html.P("No messages in the selected dates."), {}, {}, {}, {}, {}, '', {}, {})
 
     # Prepare the figures and other data
     # Placeholder examples
@@ -406,24 +410,19 @@ def update_charts(selected_issuer):
     dow_chart = go.Figure()
     dom_chart = go.Figure()
     month_chart = go.Figure()
-    sentiment_fig = sentiment_analysis(file_content, selected_issuer)
-    wordcloud_img = generate_wordcloud(text_normalizer(file_content, 'english'))
     
     print(f"Selected issuer: {selected_issuer}")
 
-    # Inicializar filtered_df como un DataFrame vacío
-    filtered_df = pd.DataFrame()
+    # Conteos del emisor seleccionado, precalculados al subir el archivo
+    counts = cube[selected_issuer]
     # print(selected_issuer, type(selected_issuer))
     
     if selected_issuer == "GENERAL":
     
         # if df.empty:
         #     return (html.P("No data available for 'GENERAL'."), {}, {}, {}, {}, {}, '')
-        print(df.shape)
-        filtered_df = df.copy()
         
         # General charts
-        issuer_messages = text_normalizer(file_content, language=language)
         sentiment_fig = sentiment_analysis(file_content)
         issuer_counts = file_content['ISSUER'].value_counts().reset_index()
         issuer_counts.columns = ['ISSUER', 'COUNT']
@@ -454,49 +453,103 @@ def update_charts(selected_issuer):
     
     else:
     
-        filtered_df = df[df['ISSUER'] == selected_issuer]
-        issuer_messages = text_normalizer(file_content[file_content['ISSUER'] == selected_issuer], language=language)
         sentiment_fig = sentiment_analysis(file_content, selected_issuer)
         general_charts = ""
     
-    print(f"Filtered DataFrame shape: {filtered_df.shape}")
-    
     bar_colors = sns.color_palette("husl", n_colors=31).as_hex()
     
     # Gráfico de mensajes por hora
-    hour_data = filtered_df.groupby('HOUR')['MESSAGE'].count().reset_index()
     hour_chart = {
-        'data': [go.Bar(x=hour_data['HOUR'], y=hour_data['MESSAGE'], marker={'color': bar_colors})],
+        'data': [go.Bar(x=list(range(24)), y=counts['HOUR'], marker={'color': bar_colors})],
         'layout': go.Layout(title='amount of messages per hour'.title())
     }
     
     # Gráfico de mensajes por día de la semana
-    dow_data = filtered_df.groupby('dow')['MESSAGE'].count().reset_index()
-    dow_data['dow'] = dow_data['dow'].map(days_of_the_week)
     dow_chart = {
-        'data': [go.Bar(x=dow_data['dow'], y=dow_data['MESSAGE'], marker={'color': bar_colors})],
+        'data': [go.Bar(x=list(days_of_the_week.values()), y=counts['dow'], marker={'color': bar_colors})],
         'layout': go.Layout(title='amount of messages per day of the week'.title())
     }
     
     # Gráfico de mensajes por día del mes
-    dom_data = filtered_df.groupby('dom')['MESSAGE'].count().reset_index()
     dom_chart = {
-        'data': [go.Bar(x=dom_data['dom'], y=dom_data['MESSAGE'], marker={'color': bar_colors})],
+        'data': [go.Bar(x=list(range(1, 32)), y=counts['dom'], marker={'color': bar_colors})],
         'layout': go.Layout(title='amount of messages per day of the month'.title())
     }
     
     # Gráfico de mensajes por mes
-    month_data = filtered_df.groupby('month')['MESSAGE'].count().reset_index()
-    month_data['month'] = month_data['month'].map(months)
     month_chart = {
-        'data': [go.Bar(x=month_data['month'], y=month_data['MESSAGE'], marker={'color': bar_colors})],
+        'data': [go.Bar(x=list(months.values()), y=counts['month'], marker={'color': bar_colors})],
         'layout': go.Layout(title='amount of messages per month'.title())
     }
     
-    # Generar nube de palabras
-    wordcloud_img = generate_wordcloud(issuer_messages)
+    # Generar nube de palabras (desde las frecuencias de la sesión, en caché por emisor y fechas)
+    wordcloud_img = get_wordcloud(session_id_from(search), selected_issuer, start_date, end_date)
+
+    # Gráfico de mensajes por día y por semana
+    issuer_content = file_content if selected_issuer == "GENERAL" else file_content[file_content['ISSUER'] == selected_issuer]
+    per_day = messages_per_period(issuer_content, 'D')
+    per_week = messages_per_period(issuer_content, 'W')
+    timeline_chart = {
+        'data': [go.Scatter(x=per_day.index, y=per_day.values, mode='lines', name='Per day'),
+                 go.Scatter(x=per_week.index, y=per_week.values, mode='lines', name='Per week')],
+        'layout': go.Layout(title='amount of messages over time'.title())
+    }
+
+    # Gráfico de tiempo de respuesta entre emisores
+    latency = response_latency(file_content)
+    latency_chart = {
+        'data': [go.Bar(x=latency['ISSUER'], y=latency['MEDIAN_MINUTES'], text=latency['RESPONSES'], 
+                        hovertemplate='%{x}: %{y:.1f} min (%{text} responses)<extra></extra>', 
+                        marker={'color': bar_colors})],
+        'layout': go.Layout(title='median response time by issuer (minutes)'.title())
+    }
 
-    return (general_charts, hour_chart, dow_chart, dom_chart, month_chart, sentiment_fig, wordcloud_img)
+    return (general_charts, hour_chart, dow_chart, dom_chart, month_chart, sentiment_fig, wordcloud_img, 
+            timeline_chart, latency_chart)
+
+# JOBS
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Returns the status and progress of a background job as JSON"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify({
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'progress': round(job['progress'], 3),
+        'message': job['message'],
+        'result_url': url_for('job_result', job_id=job_id)
+    })
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Shows the result of a background job, or its progress page if it is still running"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return "Job not found or expired", 404
+    if job['status'] in ('queued', 'running'):
+        return job_page(job_id, job['kind'])
+
+    error, result = job['error'], job['result']
+    if isinstance(error, UploadTooLargeError):
+        return str(error), 413
+    if isinstance(error, NLPResourceError):
+        return str(error), 503
+
+    if job['kind'] == 'keyphrase':
+        if error:
+            return redirect(url_for('keyphrase_extraction'))
+        return render_template('keyphrase_extraction.html', results=result)
+    if job['kind'] == 'seasonality':
+        if error:
+            return render_template('seasonality_prediction_error.html')
+        return render_template('seasonality_prediction.html', **result)
+    if error:
+        return f"Error processing the chat: {error}", 500
+    # Redirigir al dashboard
+    return redirect(f'/dashboard/?session={result}')
 
 # RUNNING SCRIPT
 if __name__ == '__main__':
@@ -0,0 +1,66 @@
+# Benchmark of keyphrase extraction: serial versus process-pool n-gram counting on multi-megabyte texts
+import os, sys, json, time, random, argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nltk
+
+from modules.keyphrase_extraction import count_ngrams, ngram_table
+
+def synthetic_text(
+        size : int,
+        vocabulary_size : int = 5000,
+        seed : int = 0) -> str:
+    """
+    Builds a text of about 'size' characters made of random sentences over a Zipf-like vocabulary.
+    """
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 10)))
+                  for _ in range(vocabulary_size)]
+    weights = [1 / rank for rank in range(1, vocabulary_size + 1)]
+    sentences, length = [], 0
+    while length < size:
+        sentence = ' '.join(rng.choices(vocabulary, weights, k=rng.randint(5, 25))).capitalize() + '.'
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(sentences)
+
+def run(
+        sentences : list,
+        max_n : int,
+        workers : int) -> tuple:
+    """
+    Counts the n-grams of the sentences with the given number of workers and returns the tables and the seconds taken.
+    """
+    start = time.perf_counter()
+    counter = count_ngrams(sentences, max_n, workers=workers)
+    tables = {n: ngram_table(counter, n, limit=10, rows_per_table=10) for n in range(1, max_n + 1)}
+    return tables, time.perf_counter() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark serial versus parallel keyphrase extraction.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[250000, 500000, 1000000, 4000000, 16000000], 
+                        help='Text sizes in characters, from below PARALLEL_MIN_CHARS to find where the parallel mode pays off')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes in parallel mode')
+    parser.add_argument('--max-n', type=int, default=5, help='Highest n-gram order')
+    parser.add_argument('--output', default='bench_keyphrase_parallel.json', help='File where the results are written')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        sentences = nltk.sent_tokenize(synthetic_text(size))
+        serial_tables, serial_seconds = run(sentences, args.max_n, 1)
+        parallel_tables, parallel_seconds = run(sentences, args.max_n, args.workers)
+        case = {
+            'size': size,
+            'sentences': len(sentences),
+            'workers': args.workers,
+            'serial_seconds': round(serial_seconds, 3),
+            'parallel_seconds': round(parallel_seconds, 3),
+            'speedup': round(serial_seconds / parallel_seconds, 2),
+            'identical': all(serial_tables[n].equals(parallel_tables[n]) for n in serial_tables),
+        }
+        print(json.dumps(case))
+        results.append(case)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
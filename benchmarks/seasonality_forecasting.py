@@ -0,0 +1,138 @@
+# Benchmark of the seasonality forecasting path: decomposition, regression and plotting, timed separately
+import os, sys, json, time, platform, argparse, subprocess, tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from modules.seasonality_prediction import seasonal_indices, trend_forecast, render_plots
+
+LENGTHS = [10**2, 10**3, 10**4, 10**5, 10**6, 10**7]
+PERIODICITIES = [4, 12, 52, 365]
+
+def synthetic_series(
+        length : int,
+        periodicity : int,
+        seed : int = 0) -> np.ndarray:
+    """
+    Builds a positive series with a linear trend, a sinusoidal seasonal pattern and multiplicative noise.
+    The length is rounded down to a multiple of the periodicity (and up to at least three cycles).
+    """
+    n_obs = max(length // periodicity, 3) * periodicity
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_obs)
+    seasonal = 1 + 0.3 * np.sin(2 * np.pi * t / periodicity)
+    trend = 100 + 0.01 * t
+    return trend * seasonal * rng.uniform(0.95, 1.05, n_obs)
+
+def measure(function, *args) -> tuple:
+    """
+    Runs 'function(*args)' twice and returns its result, the elapsed seconds and the peak traced memory in bytes.
+    The time comes from a run without tracemalloc, whose tracing would slow the allocation-heavy stages down, 
+    and the peak memory from a second, traced run.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def benchmark_case(
+        length : int,
+        periodicity : int,
+        max_plot_length : int) -> dict:
+    """
+    Times the decomposition, the regression and (for series up to 'max_plot_length' points) the plotting
+    of one synthetic series.
+    """
+    serie = synthetic_series(length, periodicity)
+    values = serie[:, None]
+    cumsum = np.concatenate([np.zeros((1, 1)), np.cumsum(values, axis=0)])
+
+    adj_seas_index, decomposition_seconds, decomposition_peak = measure(seasonal_indices, values, cumsum, periodicity)
+    forecast, regression_seconds, regression_peak = measure(trend_forecast, values, adj_seas_index, periodicity)
+
+    case = {
+        'length': len(serie),
+        'periodicity': periodicity,
+        'decomposition_seconds': round(decomposition_seconds, 6),
+        'decomposition_peak_bytes': decomposition_peak,
+        'regression_seconds': round(regression_seconds, 6),
+        'regression_peak_bytes': regression_peak,
+        'plotting_seconds': None,
+        'plotting_peak_bytes': None,
+    }
+
+    if len(serie) <= max_plot_length:
+        # The holdout forecast is not needed to time the drawing, the next cycle stands in for it
+        prediction = [float(value) for value in forecast[:, 0]]
+        _, plotting_seconds, plotting_peak = measure(
+            render_plots, pd.Series(serie), prediction, prediction, periodicity)
+        case['plotting_seconds'] = round(plotting_seconds, 6)
+        case['plotting_peak_bytes'] = plotting_peak
+    return case
+
+def git_revision() -> str:
+    """Returns the current git commit, or None outside a repository."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+def compare(
+        results : dict,
+        baseline : dict,
+        tolerance : float) -> list:
+    """
+    Lists the timings that are more than 'tolerance' times slower than in the baseline results.
+    """
+    previous = {(case['length'], case['periodicity']): case for case in baseline['cases']}
+    regressions = []
+    for case in results['cases']:
+        reference = previous.get((case['length'], case['periodicity']))
+        if reference is None:
+            continue
+        for stage in ['decomposition_seconds', 'regression_seconds', 'plotting_seconds']:
+            if case[stage] and reference.get(stage) and case[stage] > reference[stage] * tolerance:
+                regressions.append(
+                    f"{stage} length={case['length']} periodicity={case['periodicity']}: "
+                    f"{reference[stage]:.6f}s -> {case[stage]:.6f}s")
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the seasonality forecasting path.')
+    parser.add_argument('--lengths', type=int, nargs='+', default=LENGTHS, help='Approximate series lengths')
+    parser.add_argument('--periodicities', type=int, nargs='+', default=PERIODICITIES, help='Seasonal periodicities')
+    parser.add_argument('--max-plot-length', type=int, default=10**5, help='Longest series that is also plotted')
+    parser.add_argument('--output', default='bench_seasonality.json', help='File where the results are written')
+    parser.add_argument('--baseline', help='Previous results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='Slowdown ratio reported as a regression')
+    args = parser.parse_args()
+
+    results = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'cases': [],
+    }
+    for periodicity in args.periodicities:
+        for length in args.lengths:
+            case = benchmark_case(length, periodicity, args.max_plot_length)
+            print(json.dumps(case))
+            results['cases'].append(case)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,82 @@
+# Benchmark of the World Bank choropleth: generation time and page weight of the rendered HTML
+import os, sys, json, time, argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import folium
+from branca.colormap import linear
+
+from modules.world_bank import build_heatmap, get_world_geometry
+
+def synthetic_year_data(seed : int = 0) -> pd.DataFrame:
+    """
+    Builds one random value per country in the world geometry, shaped like an 'IndicatorStore' year query.
+    """
+    rng = np.random.default_rng(seed)
+    world = get_world_geometry()
+    return pd.DataFrame({
+        'ISO_CODE': world.index,
+        'COUNTRY': world['name'].values,
+        'DATE': '2020',
+        'VALUE': rng.uniform(0, 1e6, len(world)),
+    })
+
+def legacy_heatmap(df : pd.DataFrame) -> folium.Map:
+    """
+    Reference implementation of the map before the geometry cache: the shapefile is read on every call and
+    every country is added as its own GeoJson layer.
+    """
+    df = df.loc[df.groupby('COUNTRY')['DATE'].idxmax()]
+    df['DATE'] = pd.to_datetime(df['DATE'])
+    world = gpd.read_file(gpd.datasets.get_path('naturalearth_lowres'))[['iso_a3', 'geometry', 'name']]
+    world = world.merge(df, how='left', left_on='iso_a3', right_on='ISO_CODE')
+    m = folium.Map(location=[20, 0], zoom_start=2)
+    colormap = linear.YlOrRd_09.scale(df['VALUE'].min(), df['VALUE'].max())
+    for _, row in world.iterrows():
+        if pd.notna(row['VALUE']):
+            geo_json = folium.GeoJson(
+                row['geometry'],
+                style_function=lambda x, value=row['VALUE']: {
+                    'fillColor': colormap(value),
+                    'color': 'black',
+                    'weight': 0.5,
+                    'fillOpacity': value / df['VALUE'].max()
+                }
+            )
+            geo_json.add_child(folium.Tooltip(f"{row['name']} ({row['DATE'].year}): {round(row['VALUE'], 2):,}"))
+            geo_json.add_to(m)
+    colormap.add_to(m)
+    return m
+
+def measure(build, df : pd.DataFrame, repeat : int) -> dict:
+    """
+    Times 'build(df)' plus the HTML rendering over 'repeat' runs and reports the size of the page.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = build(df.copy()).get_root().render()
+        timings.append(time.perf_counter() - start)
+    return {
+        'best_seconds': round(min(timings), 4),
+        'mean_seconds': round(float(np.mean(timings)), 4),
+        'html_bytes': len(html.encode('utf-8')),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the World Bank choropleth renderer.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per implementation')
+    parser.add_argument('--output', default='bench_world_bank_heatmap.json', help='File where the results are written')
+    args = parser.parse_args()
+
+    df = synthetic_year_data()
+    get_world_geometry()  # Warm the geometry cache so only rendering is timed
+    results = {
+        'legacy': measure(legacy_heatmap, df, args.repeat),
+        'single_layer': measure(build_heatmap, df, args.repeat),
+    }
+    print(json.dumps(results, indent=4))
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
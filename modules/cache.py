@@ -0,0 +1,245 @@
+# Import necessary libraries
+import os, sys, time, pickle, hashlib, threading, itertools
+from collections import OrderedDict
+
+# Containers with more items than this are sized from a sample of them
+SIZE_SAMPLE = 1000
+
+def estimate_size(value) -> int:
+    """
+    Estimates the memory taken by a value in bytes without serializing it: NumPy arrays and pandas
+    objects report their own size, containers and objects add up their items (extrapolated from the
+    first SIZE_SAMPLE items of large containers) and anything else falls back to sys.getsizeof.
+    """
+    if hasattr(value, 'memory_usage') and hasattr(value, 'ndim'):  # pandas Series or DataFrame
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if hasattr(value, 'nbytes') and not isinstance(value, (bytes, bytearray)):  # NumPy array
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(itertools.islice(value.items(), SIZE_SAMPLE))
+        sample = sum(estimate_size(key) + estimate_size(item) for key, item in items)
+        return sys.getsizeof(value) + (sample * len(value) // len(items) if items else 0)
+    if isinstance(value, (list, tuple, set, frozenset)) or hasattr(value, '__len__') and hasattr(value, '__iter__'):
+        items = list(itertools.islice(value, SIZE_SAMPLE))
+        sample = sum(estimate_size(item) for item in items)
+        return sys.getsizeof(value) + (sample * len(value) // len(items) if items else 0)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + estimate_size(vars(value))
+    return sys.getsizeof(value)
+
+class PersistentCache:
+    """
+    Thread-safe key/value cache kept in memory and optionally mirrored on disk.
+
+    Entries expire once they are older than 'ttl' seconds, and the least recently used entries
+    are evicted whenever the cache holds more than 'max_entries' items or more than 'max_bytes'
+    bytes (the size of the pickle file when entries are persisted, an estimate from 'estimate_size'
+    otherwise). 'get_or_set' computes a missing key once even when several threads ask for it at the
+    same time. When a 'cache_dir' is given every entry is also written
+    there as a pickle file, so the cache is reloaded from disk after a restart, and keys missing from
+    memory are looked up on disk, so processes sharing the folder see each other's entries.
+    """
+
+    def __init__(
+            self,
+            max_entries : int = 128,
+            max_bytes : int = None,
+            ttl : float = None,
+            cache_dir : str = None) -> None:
+        """
+        Parameters:
+        - max_entries (int): Maximum number of entries kept (default is 128).
+        - max_bytes (int): Maximum total size in bytes of the pickled values (optional, no limit if None).
+        - ttl (float): Time to live of an entry in seconds (optional, entries never expire if None).
+        - cache_dir (str): Folder where entries are persisted (optional, memory only if None).
+        """
+        assert isinstance(max_entries, int) and max_entries > 0, "The 'max_entries' must be a positive integer"
+        assert max_bytes is None or isinstance(max_bytes, int), "The 'max_bytes' must be an integer or None"
+        assert ttl is None or isinstance(ttl, (int, float)), "The 'ttl' must be a number or None"
+        assert cache_dir is None or isinstance(cache_dir, str), "The 'cache_dir' must be a string or None"
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()  # key -> (timestamp, size, value), ordered from least to most recently used
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._key_locks = {}  # key -> [lock, number of threads using it], for single-flight 'get_or_set'
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_from_disk()
+
+    def _path(self, key) -> str:
+        """Returns the file path used to persist a key."""
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.pkl')
+
+    def _expired(self, timestamp : float) -> bool:
+        """Checks whether an entry created at 'timestamp' is older than the TTL."""
+        return self.ttl is not None and time.time() - timestamp > self.ttl
+
+    def _load_from_disk(self) -> None:
+        """Reloads persisted entries, oldest first, dropping the expired or unreadable ones."""
+        records = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.pkl'):
+                continue
+            file_path = os.path.join(self.cache_dir, filename)
+            try:
+                with open(file_path, 'rb') as f:
+                    key, timestamp, value = pickle.load(f)
+                records.append((timestamp, key, value, os.path.getsize(file_path)))
+            except Exception as e:
+                print(f"Error loading cache file {file_path}: {e}")
+                self._remove_file(file_path)
+
+        for timestamp, key, value, size in sorted(records, key=lambda record: record[0]):
+            if self._expired(timestamp):
+                self._remove_file(self._path(key))
+                continue
+            self._entries[key] = (timestamp, size, value)
+            self._total_bytes += size
+        self._evict()
+
+    def _read_entry(self, key):
+        """Loads a key written to disk by another process, returning its entry or None."""
+        file_path = self._path(key)
+        try:
+            with open(file_path, 'rb') as f:
+                stored_key, timestamp, value = pickle.load(f)
+            size = os.path.getsize(file_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading cache file {file_path}: {e}")
+            return None
+        if stored_key != key:
+            return None
+        self._entries[key] = (timestamp, size, value)
+        self._total_bytes += size
+        self._evict()
+        return self._entries.get(key)
+
+    def _remove_file(self, file_path : str) -> None:
+        """Deletes a persisted entry, ignoring missing files."""
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+    def _drop(self, key) -> None:
+        """Removes a key from memory and disk."""
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+        if self.cache_dir:
+            self._remove_file(self._path(key))
+
+    def _evict(self) -> None:
+        """Evicts least recently used entries until the size limits are respected."""
+        while self._entries and (
+                len(self._entries) > self.max_entries or
+                (self.max_bytes is not None and self._total_bytes > self.max_bytes)):
+            self._drop(next(iter(self._entries)))
+
+    def get(self, key, default=None, fresh : bool = False):
+        """
+        Returns the cached value for 'key', or 'default' if it is missing or expired. With 'fresh' the
+        key is read again from disk, to see updates written by other processes sharing the folder.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if fresh and self.cache_dir and entry is not None:
+                # Forget the copy in memory only, the file is the one being reloaded
+                self._entries.pop(key)
+                self._total_bytes -= entry[1]
+                entry = None
+            if entry is None and self.cache_dir:
+                entry = self._read_entry(key)
+            if entry is None:
+                return default
+            if self._expired(entry[0]):
+                self._drop(key)
+                return default
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, value) -> None:
+        """
+        Stores 'value' under 'key', persisting it when a cache folder is configured.
+        """
+        timestamp = time.time()
+        if self.cache_dir:
+            # The value is serialized once, for the file, and its size is the size of what is written
+            payload = pickle.dumps((key, timestamp, value), protocol=pickle.HIGHEST_PROTOCOL)
+            size = len(payload)
+        else:
+            payload = None
+            size = estimate_size(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if payload is not None:
+                # Write to a temporary file first so a crash never leaves a truncated entry behind
+                file_path = self._path(key)
+                tmp_path = f'{file_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_path, file_path)
+            self._entries[key] = (timestamp, size, value)
+            self._total_bytes += size
+            self._evict()
+
+    def _acquire_key(self, key) -> threading.Lock:
+        """Returns the lock of a key, registering the calling thread as one of its users."""
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _release_key(self, key) -> None:
+        """Unregisters the calling thread from the lock of a key, dropping the lock once unused."""
+        with self._lock:
+            entry = self._key_locks[key]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._key_locks[key]
+
+    def get_or_set(self, key, factory):
+        """
+        Returns the cached value for 'key', computing and storing it with 'factory()' when missing.
+        Concurrent calls for the same missing key wait for the first one instead of computing it again.
+        None results are not cached so failed computations are retried on the next call.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        key_lock = self._acquire_key(key)
+        try:
+            with key_lock:
+                value = self.get(key)  # Computed by another thread while this one was waiting
+                if value is None:
+                    value = factory()
+                    if value is not None:
+                        self.set(key, value)
+                return value
+        finally:
+            self._release_key(key)
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        """Removes every entry from memory and disk."""
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
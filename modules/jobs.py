@@ -0,0 +1,263 @@
+# Import necessary libraries
+import os, time, uuid, threading, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from modules.cache import PersistentCache
+
+# Finished jobs are kept this many seconds for their result to be fetched
+JOB_RESULT_TTL = 60 * 60
+
+# Maximum number of jobs kept, the least recently updated are dropped first
+JOB_MAX_RESULTS = 100
+
+# Workers are started from a clean server process instead of forking the app, which may hold threads
+# (cache prewarming, progress collection) and locks that a forked child would inherit in any state
+JOB_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Set in every worker process: queue where progress is reported and job currently running
+_progress_queue = None
+_current_job = None
+
+def _init_worker(
+        progress_queue,
+        initializer = None) -> None:
+    """
+    Function run once in every worker process: keeps the progress queue and runs the user initializer.
+    """
+    global _progress_queue
+    _progress_queue = progress_queue
+    if initializer is not None:
+        initializer()
+
+def _run_job(
+        job_id : str,
+        function,
+        args : tuple,
+        kwargs : dict):
+    """
+    Function run in a worker process for every job: calls 'function' with the job id set, so
+    'report_progress' knows which job it reports for.
+    """
+    global _current_job
+    _current_job = job_id
+    try:
+        report_progress(0.0, 'Started')
+        return function(*args, **kwargs)
+    finally:
+        _current_job = None
+
+def in_job() -> bool:
+    """
+    Function to check whether the calling process is running a job. Jobs already use one CPU per worker,
+    so the functions they call run serially instead of starting pools of their own.
+    """
+    return _current_job is not None
+
+def report_progress(
+        fraction : float,
+        message : str = None) -> None:
+    """
+    Function to report the progress of the job running in this process. It does nothing outside a job,
+    so the functions that call it can also be used synchronously.
+
+    Args:
+    - fraction (float): Completed fraction of the job, between 0 and 1.
+    - message (str): Description of the current step (optional).
+    """
+    if _progress_queue is not None and _current_job is not None:
+        _progress_queue.put((_current_job, min(max(float(fraction), 0.0), 1.0), message))
+
+class ProgressReader:
+    """
+    Binary file wrapper that reports the share of the expected bytes read so far as job progress,
+    mapped to the ['start', 'end'] range of the job.
+    """
+
+    def __init__(
+            self,
+            file,
+            total_bytes : int,
+            start : float = 0.0,
+            end : float = 1.0,
+            message : str = None) -> None:
+        """
+        Parameters:
+        - file: Binary file-like object to read from.
+        - total_bytes (int): Number of bytes expected to be read in total (several passes count several times).
+        - start (float): Progress reported before reading (default is 0.0).
+        - end (float): Progress reported once 'total_bytes' have been read (default is 1.0).
+        - message (str): Description of the step reported with the progress (optional).
+        """
+        self.file = file
+        self.total_bytes = max(total_bytes, 1)
+        self.start = start
+        self.end = end
+        self.message = message
+        self.bytes_read = 0
+        self._last_reported = None
+
+    def read(self, size : int = -1) -> bytes:
+        chunk = self.file.read(size)
+        self.bytes_read += len(chunk)
+        fraction = self.start + (self.end - self.start) * min(self.bytes_read / self.total_bytes, 1.0)
+        # Report at most once per percent to keep the queue quiet
+        if self._last_reported is None or fraction - self._last_reported >= 0.01:
+            report_progress(fraction, self.message)
+            self._last_reported = fraction
+        return chunk
+
+    def seekable(self) -> bool:
+        return self.file.seekable()
+
+    def seek(self, offset : int, whence : int = 0) -> int:
+        return self.file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+class JobQueue:
+    """
+    Local background job runner: jobs are executed by a pool of worker processes, identified by a
+    random id, report their progress through a queue and keep their result (or error) for 'result_ttl'
+    seconds once finished. It needs no broker: job records are kept in a PersistentCache and, when a
+    'store_dir' is given, written there on every update, so every process sharing the folder (e.g. the
+    gunicorn workers of the app) can report the status and result of a job started by another one.
+    """
+
+    def __init__(
+            self,
+            max_workers : int = None,
+            result_ttl : float = JOB_RESULT_TTL,
+            max_results : int = JOB_MAX_RESULTS,
+            initializer = None,
+            store_dir : str = None) -> None:
+        """
+        Parameters:
+        - max_workers (int): Number of worker processes (optional, one per CPU if None).
+        - result_ttl (float): Seconds a finished job is kept (default is JOB_RESULT_TTL).
+        - max_results (int): Maximum number of jobs kept (default is JOB_MAX_RESULTS).
+        - initializer (callable): Function run once in every worker process, e.g. to load resources (optional).
+        - store_dir (str): Folder shared by the processes where job records are kept (optional, memory only if None).
+        """
+        assert max_workers is None or (isinstance(max_workers, int) and max_workers > 0), "The 'max_workers' must be a positive integer or None"
+        assert isinstance(result_ttl, (int, float)), "The 'result_ttl' must be a number"
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self.initializer = initializer
+        # Records are rewritten on every update, so the TTL runs from the last update (the end of a finished job)
+        self._jobs = PersistentCache(max_entries=max_results, ttl=result_ttl, cache_dir=store_dir)
+        self._lock = threading.RLock()
+        self._executor = None  # Started with the first job, so importing the app does not spawn processes
+        self._progress_queue = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Starts the worker pool and the thread that collects progress reports, once."""
+        with self._lock:
+            if self._executor is None:
+                context = multiprocessing.get_context(JOB_START_METHOD)
+                if self._progress_queue is None:
+                    self._progress_queue = context.Queue()
+                    threading.Thread(target=self._collect_progress, daemon=True).start()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self._progress_queue, self.initializer))
+            return self._executor
+
+    def _collect_progress(self) -> None:
+        """Applies the progress reported by the workers to the running jobs."""
+        while True:
+            job_id, fraction, message = self._progress_queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job['status'] not in ('queued', 'running'):
+                    continue
+                job['status'] = 'running'
+                job['progress'] = fraction
+                if message:
+                    job['message'] = message
+                self._jobs.set(job_id, job)
+
+    def submit(
+            self,
+            kind : str,
+            function,
+            *args,
+            files : list = (),
+            on_done = None,
+            **kwargs) -> str:
+        """
+        Queues 'function(*args, **kwargs)' to run in a worker process and returns the job id.
+
+        Parameters:
+        - kind (str): Name of the kind of job, used by the caller to present its result.
+        - function (callable): Module-level function to run; it and its arguments must be picklable.
+        - files (list): Paths of temporary files deleted once the job ends (optional).
+        - on_done (callable): Function applied in this process to the result of the job, e.g. to store
+          it somewhere only this process can reach (optional).
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs.set(job_id, {
+                'id': job_id,
+                'kind': kind,
+                'status': 'queued',
+                'progress': 0.0,
+                'message': 'Queued',
+                'result': None,
+                'error': None,
+                'created': time.time(),
+                'finished': None,
+            })
+
+        try:
+            future = self._get_executor().submit(_run_job, job_id, function, args, kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory), start a new pool for this and later jobs
+            with self._lock:
+                self._executor = None
+            future = self._get_executor().submit(_run_job, job_id, function, args, kwargs)
+        future.add_done_callback(lambda future: self._finish(job_id, future, on_done, files))
+        return job_id
+
+    def _finish(
+            self,
+            job_id : str,
+            future,
+            on_done,
+            files : list) -> None:
+        """Stores the result or the error of a job and deletes its temporary files."""
+        try:
+            result = future.result()
+            if on_done is not None:
+                result = on_done(result)
+            update = {'status': 'finished', 'progress': 1.0, 'message': 'Done', 'result': result}
+        except Exception as e:
+            print(f"Error running job {job_id}: {e}")
+            update = {'status': 'failed', 'message': 'Failed', 'error': e}
+        finally:
+            for file_path in files:
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(update, finished=time.time())
+                self._jobs.set(job_id, job)
+
+    def get(self, job_id : str) -> dict:
+        """
+        Returns a copy of the job record (id, kind, status, progress, message, result, error, created,
+        finished), or None if the job does not exist or has expired.
+        """
+        with self._lock:
+            # Read from the store again, the job may be run and updated by another process
+            job = self._jobs.get(job_id, fresh=True)
+            return dict(job) if job is not None else None
@@ -1,8 +1,148 @@
 import nltk
 import pandas as pd
-from tqdm import tqdm  # For displaying progress bars
 from unidecode import unidecode  # For removing accents from characters
 import re  # For regular expressions
+import heapq  # For selecting the top n-grams without a full sort
+from functools import lru_cache  # For memoizing normalizers and transliterations
+import os, codecs, hashlib, multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor  # For counting n-grams of large texts in parallel
+from modules.nlp_resources import get_stopwords, require_resources, warm_up
+from modules.cache import PersistentCache
+from modules.jobs import ProgressReader, in_job, JOB_START_METHOD
+
+# Number of distinct n-grams kept per order while counting, bounding memory on big uploads
+MAX_NGRAMS = 200000
+
+# Texts of at least this many characters are processed by a pool of worker processes. Counting takes about
+# 5 s per megabyte serially, while starting the pool and loading the NLP resources in its workers costs
+# 0.3-0.4 s, so from 1 MB on the pool saves seconds on any multi-core machine. Tune it with
+# KEYPHRASE_PARALLEL_MIN_CHARS after running benchmarks/keyphrase_parallel.py on the target machine
+PARALLEL_MIN_CHARS = int(os.environ.get('KEYPHRASE_PARALLEL_MIN_CHARS', 1000000))
+
+# Number of consecutive sentences normalized and counted together (one task per batch in parallel mode)
+BATCH_SENTENCES = 2000
+
+# Uploads are read in chunks of this many bytes, and rejected beyond the maximum size
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+SENTENCES_HELD_BACK = 2
+
+# Unfinished text kept at most while streaming; beyond it (e.g. a text without punctuation) it is cut
+# at the last line break or space so the buffer, and the time spent tokenizing it again, stay bounded
+MAX_SENTENCE_CHARS = 256 * 1024
+
+class UploadTooLargeError(ValueError):
+    """Raised when an uploaded text exceeds the maximum accepted size."""
+
+# Cache of n-gram counts keyed by the SHA-256 of the uploaded content. It is kept on disk (KEYPHRASE_CACHE_DIR) 
+# so the job workers and app processes, each with its own memory, share every count
+ngram_cache = PersistentCache(
+    max_entries=32, 
+    max_bytes=512 * 1024 * 1024, 
+    cache_dir=os.environ.get('KEYPHRASE_CACHE_DIR', os.path.join('cache', 'keyphrase')))
+
+class NgramCounter:
+    """
+    Streaming counter of every n-gram order from 1 to 'max_n' in a single pass over the tokens.
+
+    Tokens are pushed through a sliding window of the last 'max_n' tokens, and each new token closes 
+    exactly one n-gram of every order, so the corpus is tokenized and traversed once whatever the number 
+    of orders. The window is carried across 'update' calls, so feeding the sentences one by one counts 
+    the same n-grams as the flattened corpus. When 'max_ngrams' is set, each order that grows past twice 
+    that size is reduced with a batched Misra-Gries step (see 'prune'), which bounds memory on big uploads 
+    at the cost of approximate counts: with N n-grams of an order counted, every count is an underestimate 
+    by at most N / (max_ngrams + 1), and every n-gram more frequent than that is kept. Counters pruned this 
+    way can still be merged, the bound then applying to the N of both.
+    """
+
+    def __init__(
+            self, 
+            max_n : int = 5, 
+            max_ngrams : int = None) -> None:
+        """
+        Args:
+        - max_n (int): Highest n-gram order to count (default is 5).
+        - max_ngrams (int): Number of n-grams kept per order when pruning (default is None, no pruning).
+        """
+        assert isinstance(max_n, int) and max_n > 0, "The 'max_n' input must be a positive integer"
+        assert max_ngrams is None or isinstance(max_ngrams, int), "The 'max_ngrams' input must be an integer or None"
+
+        self.max_n = max_n
+        self.max_ngrams = max_ngrams
+        self.counts = {n: Counter() for n in range(1, max_n + 1)}
+        self.window = deque(maxlen=max_n)
+        self.head = []  # First max_n - 1 tokens, needed to merge counters of consecutive chunks
+
+    def update(self, tokens : list) -> None:
+        """
+        Counts the n-grams closed by each of the given tokens.
+        """
+        for token in tokens:
+            if len(self.head) < self.max_n - 1:
+                self.head.append(token)
+            self.window.append(token)
+            window = tuple(self.window)
+            for n in range(1, len(window) + 1):
+                self.counts[n][window[-n:]] += 1
+        if self.max_ngrams:
+            self.prune()
+
+    def update_text(self, text : str) -> None:
+        """
+        Tokenizes a text with NLTK and counts its n-grams.
+        """
+        self.update(nltk.word_tokenize(text))
+
+    def merge(self, other : 'NgramCounter') -> None:
+        """
+        Adds the counts of a counter that processed the tokens following this one's, so counting 
+        consecutive chunks separately and merging them in order gives the same result as a single pass.
+
+        The n-grams spanning the boundary are counted first, by replaying the head of 'other' after this 
+        counter's window, which also preserves the order of first appearance used to break ties.
+        """
+        assert other.max_n == self.max_n, "Both counters must count the same n-gram orders"
+
+        window = deque(self.window, maxlen=self.max_n)
+        for position, token in enumerate(other.head):
+            window.append(token)
+            ngram = tuple(window)
+            for n in range(position + 2, len(ngram) + 1):
+                self.counts[n][ngram[-n:]] += 1
+        for n, counts in other.counts.items():
+            self.counts[n].update(counts)
+
+        self.head = (self.head + other.head)[:self.max_n - 1]
+        self.window = deque(list(self.window) + list(other.window), maxlen=self.max_n)
+        if self.max_ngrams:
+            self.prune()
+
+    def prune(self) -> None:
+        """
+        Reduces every order that grew past twice 'max_ngrams' n-grams: the ('max_ngrams' + 1)-th largest 
+        count is subtracted from every count and the n-grams left without occurrences are dropped. At most 
+        'max_ngrams' n-grams survive, and tied n-grams are kept or dropped together, so the result never 
+        depends on the order they were first seen in. Each step removes at least 'max_ngrams' + 1 times 
+        the subtracted count from the total, hence the N / (max_ngrams + 1) bound on the error.
+        """
+        for n, counts in self.counts.items():
+            if len(counts) > 2 * self.max_ngrams:
+                threshold = heapq.nlargest(self.max_ngrams + 1, counts.values())[-1]
+                self.counts[n] = Counter({ngram: freq - threshold for ngram, freq in counts.items() if freq > threshold})
+
+    def top(
+            self, 
+            n : int, 
+            k : int) -> list:
+        """
+        Returns the 'k' most frequent n-grams of order 'n' as (text, frequency) pairs, using a heap instead 
+        of sorting every n-gram. Ties keep the order of first appearance.
+        """
+        assert 1 <= n <= self.max_n, "The 'n' input must be between 1 and 'max_n'"
+
+        most_common = heapq.nlargest(k, self.counts[n].items(), key=lambda x: x[1])
+        return [(' '.join(ngram), freq) for ngram, freq in most_common]
 
 def top_ngrams(
         corpus : list, 
@@ -26,24 +166,103 @@ def top_ngrams(
     assert isinstance(ngram_val, int), "The 'ngram_val' input must be an integer"
     assert isinstance(limit, int), "The 'limit' input must be an integer"
 
-    def compute_ngrams(sequence, n):
-        """Helper function to compute n-grams."""
-        return list(zip(*(sequence[index:] for index in range(n))))
-
-    def flatten_corpus(corpus):
-        """Helper function to flatten a list of documents into a single string."""
-        return ' '.join([document.strip() for document in corpus])
-    
-    corpus = flatten_corpus(corpus)
-    tokens = nltk.word_tokenize(corpus)  # Tokenize the flattened corpus
-    ngrams = compute_ngrams(tokens, ngram_val)  # Generate n-grams
-    ngrams_freq_dist = nltk.FreqDist(ngrams)  # Calculate frequency distribution of n-grams
-    sorted_ngrams_fd = sorted(ngrams_freq_dist.items(), key=lambda x: x[1], reverse=True)  # Sort n-grams by frequency
-    sorted_ngrams = sorted_ngrams_fd[:limit]  # Select top 'limit' n-grams
-    sorted_ngrams = [(' '.join(text), freq) for text, freq in sorted_ngrams]  # Combine n-gram tokens into strings
-    sorted_ngrams = sorted_ngrams[:rows_per_table]  # Limit the number of rows per table
+    counter = NgramCounter(max_n=ngram_val)
+    for document in corpus:
+        counter.update_text(document.strip())
+    return ngram_table(counter, ngram_val, limit=limit, rows_per_table=rows_per_table)
+
+def ngram_table(
+        counter : NgramCounter, 
+        ngram_val : int, 
+        limit : int = 10, 
+        rows_per_table : int = 5) -> pd.DataFrame:
+    """
+    Function to build the table of the top n-grams of one order from an NgramCounter.
+    
+    Args:
+    - counter (NgramCounter): Counter holding the n-gram frequencies.
+    - ngram_val (int): Value of n for n-grams.
+    - limit (int): Number of top n-grams to retrieve.
+    - rows_per_table (int): Number of rows per table in the output DataFrame.
+    
+    Returns:
+    - DataFrame: DataFrame containing the top n-grams and their frequencies.
+    """
+    sorted_ngrams = counter.top(ngram_val, min(limit, rows_per_table))
     return pd.DataFrame(sorted_ngrams, columns=['Keywords', '# Appearances'])
 
+@lru_cache(maxsize=65536)
+def cached_unidecode(word : str) -> str:
+    """Memoized unidecode, since the same words come up again and again in a document."""
+    return unidecode(word)
+
+class TextNormalizer:
+    """
+    Reusable text normalizer for one language, built once and shared by every request.
+
+    It holds the stopwords as a frozenset and the regular expressions precompiled, and normalizes a text 
+    in a single pass over its words: each word is lowercased, dropped if it is a stopword, stripped of 
+    non-alphanumeric characters, dropped if it is a URL or too short, and transliterated with a memoized 
+    unidecode. The result is the same as chaining those steps over the whole text.
+    """
+
+    non_alphanumeric_regex = re.compile(r'[^a-zA-Z0-9\s]')
+    url_regex = re.compile(r'http\S+')
+
+    def __init__(
+            self, 
+            language : str = 'english', 
+            minWordLen : int = 2) -> None:
+        """
+        Args:
+        - language (str): Language for stopwords (default is 'english').
+        - minWordLen (int): Minimum word length to retain in the normalized text (default is 2).
+        """
+        assert isinstance(language, str), "The 'language' must be a string"
+        assert isinstance(minWordLen, int), "The 'minWordLen' must be an integer"
+
+        self.language = language
+        self.minWordLen = minWordLen
+        self.stopwords = get_stopwords(language)  # Set of stopwords for the specified language
+
+    def normalize_words(self, data : str) -> list:
+        """
+        Returns the normalized words of a text.
+        """
+        words = []
+        for word in data.lower().split():
+            if word in self.stopwords:  # Remove stopwords
+                continue
+            word = self.non_alphanumeric_regex.sub('', word)  # Remove non-alphanumeric characters
+            if not word or self.url_regex.match(word) or len(word) <= self.minWordLen:  # Remove URLs and short words
+                continue
+            words.append(cached_unidecode(word))  # Remove accents using unidecode
+        return words
+
+    def normalize(self, data : str) -> str:
+        """
+        Returns the normalized version of a text.
+        """
+        assert isinstance(data, str), "The 'data' must be a string"
+        return ' '.join(self.normalize_words(data))
+
+    def normalize_batch(self, sentences : list) -> list:
+        """
+        Returns the normalized version of every sentence of a list.
+        """
+        assert isinstance(sentences, list), "The 'sentences' must be a list"
+        normalize_words = self.normalize_words
+        return [' '.join(normalize_words(sentence)) for sentence in sentences]
+
+@lru_cache(maxsize=None)
+def get_normalizer(
+        language : str = 'english', 
+        minWordLen : int = 2) -> TextNormalizer:
+    """
+    Function to get the shared TextNormalizer of a language, building it on first use.
+    """
+    return TextNormalizer(language=language, minWordLen=minWordLen)
+
 def text_normalizer(
         data : str, 
         language : str = 'english', 
@@ -63,35 +282,308 @@ def text_normalizer(
     assert isinstance(data, str), "The 'data' must be a string"
     assert isinstance(language, str), "The 'language' must be a string"
     assert isinstance(minWordLen, int), "The 'minWordLen' must be an integer"
-        
-    stopword_list = nltk.corpus.stopwords.words(language)  # Get list of stopwords for the specified language
-    
-    def conti_rep_char(str1):
-        """Helper function to handle repeated characters."""
-        tchr = str1.group(0)
-        if len(tchr) > 1:
-            return tchr[0:1]
-         
-    def check_unique_char(rep, sent_text):
-        """Helper function to check for unique characters in the text."""
-        convert = re.sub(r'[^a-zA-Z0-9\s]', rep, sent_text)
-        return convert
-     
-    urlRegex = re.compile(r'http\S+')
-    
-    # Normalize the input text step by step
-    data = ' '.join([word for word in data.lower().split() if word not in stopword_list])  # Remove stopwords
-    data = check_unique_char(conti_rep_char, data)  # Handle repeated characters
-    data = ' '.join([word for word in data.split() if not re.match(urlRegex, word)])  # Remove URLs
-    data = ' '.join([word for word in data.split() if len(word) > minWordLen])  # Remove short words
-    data = ' '.join([unidecode(word) for word in data.split()])  # Remove accents using unidecode
-
-    return data
+
+    return get_normalizer(language, minWordLen).normalize(data)
+
+def count_chunk(
+        sentences : list, 
+        max_n : int, 
+        language : str = 'english', 
+        max_ngrams : int = MAX_NGRAMS) -> NgramCounter:
+    """
+    Function to normalize a chunk of consecutive sentences and count its n-grams (run in this process in 
+    serial mode, by each worker process in parallel mode).
+    
+    Args:
+    - sentences (list): Raw sentences of the chunk, in order.
+    - max_n (int): Highest n-gram order to count.
+    - language (str): Language for stopwords (default is 'english').
+    - max_ngrams (int): Number of n-grams kept per order when pruning (default is MAX_NGRAMS).
+    
+    Returns:
+    - NgramCounter: Counter of the chunk, ready to be merged with the ones of its neighbours.
+    """
+    counter = NgramCounter(max_n=max_n, max_ngrams=max_ngrams)
+    for sentence in get_normalizer(language).normalize_batch(sentences):
+        counter.update_text(sentence.strip())  # Count every n-gram order in a single pass
+    return counter
+
+def iter_batches(
+        items, 
+        batch_size : int) -> iter:
+    """
+    Function to group the items of an iterable into consecutive lists of at most 'batch_size' items.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def count_ngrams(
+        sentences, 
+        max_n : int, 
+        language : str = 'english', 
+        workers : int = 1, 
+        max_ngrams : int = MAX_NGRAMS) -> NgramCounter:
+    """
+    Function to normalize sentences and count their n-grams in batches of BATCH_SENTENCES consecutive 
+    sentences, serially or by a pool of worker processes. The sentences may come from a generator: they 
+    are consumed in batches as they arrive, with at most two batches per worker in flight. Both modes count 
+    each batch with 'count_chunk' and merge the partial counters in order, so they prune at the same points 
+    and give the same counts, pruned or not.
+    
+    Args:
+    - sentences (iterable): Raw sentences, in order.
+    - max_n (int): Highest n-gram order to count.
+    - language (str): Language for stopwords (default is 'english').
+    - workers (int): Number of worker processes, 1 for serial mode (default is 1).
+    - max_ngrams (int): Number of n-grams kept per order when pruning (default is MAX_NGRAMS).
+    
+    Returns:
+    - NgramCounter: Counter with the n-grams of every sentence.
+    """
+    assert isinstance(workers, int) and workers > 0, "The 'workers' must be a positive integer"
+
+    counter = NgramCounter(max_n=max_n, max_ngrams=max_ngrams)
+    batches = iter_batches(sentences, BATCH_SENTENCES)
+
+    if workers == 1:
+        for batch in batches:
+            counter.merge(count_chunk(batch, max_n, language, max_ngrams))
+        return counter
+
+    # Workers start from a clean server process, never by forking the app with its threads
+    context = multiprocessing.get_context(JOB_START_METHOD)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=warm_up) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(count_chunk, batch, max_n, language, max_ngrams))
+            if len(pending) >= 2 * workers:
+                counter.merge(pending.popleft().result())
+        while pending:
+            counter.merge(pending.popleft().result())
+    return counter
+
+def default_workers(size : int) -> int:
+    """
+    Function to choose the number of worker processes for a text of 'size' characters (or bytes): 
+    one per CPU from PARALLEL_MIN_CHARS on, serial mode below and inside a background job. Jobs already 
+    run one per CPU, so uploads sent through the job queue (the HTML page) are always counted serially and 
+    only direct callers such as the JSON API get the parallel mode.
+    """
+    if in_job():
+        return 1
+    return (os.cpu_count() or 1) if size and size >= PARALLEL_MIN_CHARS else 1
+
+def iter_sentences(
+        stream, 
+        chunk_size : int = STREAM_CHUNK_SIZE, 
+        max_bytes : int = MAX_UPLOAD_BYTES) -> iter:
+    """
+    Function to decode a binary stream incrementally and yield its sentences as they are completed, 
+    holding only the current chunk and the unfinished last sentence in memory. A sentence longer than 
+    MAX_SENTENCE_CHARS is split at its last line break or space, so texts without punctuation are 
+    processed in linear time and bounded memory.
+    
+    The encoding is detected from the first chunk: a byte order mark selects UTF-8 or UTF-16, otherwise 
+    the text is read as UTF-8, or as Windows-1252 (a superset of Latin-1) if the first chunk is not 
+    valid UTF-8. Bytes that cannot be decoded later on are replaced instead of failing the request.
+    
+    Args:
+    - stream: Binary file-like object, e.g. an uploaded file.
+    - chunk_size (int): Number of bytes read at a time (default is STREAM_CHUNK_SIZE).
+    - max_bytes (int): Maximum number of bytes accepted (default is MAX_UPLOAD_BYTES, None for no limit).
+    
+    Yields:
+    - str: Sentences of the text, in order.
+    """
+    tokenizer = nltk.data.load('tokenizers/punkt/english.pickle')  # Same model as nltk.sent_tokenize
+    decoder = None
+    buffer = ''
+    total_bytes = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        total_bytes += len(chunk)
+        if max_bytes is not None and total_bytes > max_bytes:
+            raise UploadTooLargeError(f"The file exceeds the maximum size of {max_bytes:,} bytes")
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(detect_encoding(chunk))(errors='replace')
+        buffer += decoder.decode(chunk)
+
+        # The last sentences may change once the next chunk arrives (the boundary before a partial word 
+        # is not final), so they stay in the buffer
+        spans = list(tokenizer.span_tokenize(buffer))
+        if len(spans) > SENTENCES_HELD_BACK:
+            for start, end in spans[:-SENTENCES_HELD_BACK]:
+                yield buffer[start:end]
+            buffer = buffer[spans[-SENTENCES_HELD_BACK][0]:]
+        if len(buffer) > MAX_SENTENCE_CHARS:
+            cut = buffer.rfind('\n') + 1 or buffer.rfind(' ') + 1 or len(buffer)
+            yield from tokenizer.tokenize(buffer[:cut])
+            buffer = buffer[cut:]
+
+    if decoder is not None:
+        buffer += decoder.decode(b'', final=True)
+    yield from tokenizer.tokenize(buffer)
+
+def detect_encoding(head : bytes) -> str:
+    """
+    Function to choose the encoding of a text from its first bytes (see 'iter_sentences').
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+def build_results(
+        counter : NgramCounter, 
+        num_tables : int, 
+        num_rows : int) -> dict:
+    """
+    Function to build the n-gram tables shown to the user from a counter.
+    
+    Args:
+    - counter (NgramCounter): Counter holding the n-gram frequencies.
+    - num_tables (int): Number of n-gram tables to generate.
+    - num_rows (int): Number of rows per table in the output DataFrame.
+    
+    Returns:
+    - dict: Dictionary containing n-gram tables for each n value.
+    """
+    results = {}
+    for num in range(1, num_tables + 1):
+        tempData = ngram_table(counter, num, limit=10, rows_per_table=num_rows)
+        results[f"N-Gram Value: {num}"] = tempData  # Store n-gram table in results dictionary
+    return results
+
+def hash_stream(
+        stream, 
+        chunk_size : int = STREAM_CHUNK_SIZE, 
+        max_bytes : int = MAX_UPLOAD_BYTES) -> str:
+    """
+    Function to compute the SHA-256 of a seekable binary stream chunk by chunk, enforcing the size limit, 
+    and rewind it so it can be processed afterwards.
+    
+    Args:
+    - stream: Seekable binary file-like object, e.g. an uploaded file.
+    - chunk_size (int): Number of bytes read at a time (default is STREAM_CHUNK_SIZE).
+    - max_bytes (int): Maximum number of bytes accepted (default is MAX_UPLOAD_BYTES, None for no limit).
+    
+    Returns:
+    - str: Hexadecimal digest of the content.
+    """
+    digest = hashlib.sha256()
+    total_bytes = 0
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        total_bytes += len(chunk)
+        if max_bytes is not None and total_bytes > max_bytes:
+            raise UploadTooLargeError(f"The file exceeds the maximum size of {max_bytes:,} bytes")
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def get_ngram_counts(
+        stream, 
+        max_n : int, 
+        workers : int = 1, 
+        max_bytes : int = MAX_UPLOAD_BYTES) -> tuple:
+    """
+    Function to get the n-gram counts of an uploaded file, served from 'ngram_cache' when the same content 
+    was already counted up to at least 'max_n'. Counts depend only on the content, so every num_tables / 
+    num_rows combination reuses them. Non-seekable streams cannot be hashed before being read and are 
+    always counted.
+    
+    Args:
+    - stream: Binary file-like object, e.g. an uploaded file.
+    - max_n (int): Highest n-gram order needed.
+    - workers (int): Number of worker processes, 1 for serial mode (default is 1).
+    - max_bytes (int): Maximum number of bytes accepted (default is MAX_UPLOAD_BYTES, None for no limit).
+    
+    Returns:
+    - tuple: The NgramCounter and the SHA-256 of the content (None for non-seekable streams).
+    """
+    require_resources()  # Fail fast if the NLTK tokenizer or stopwords are not installed
+
+    content_hash = hash_stream(stream, max_bytes=max_bytes) if stream.seekable() else None
+    counter = ngram_cache.get(content_hash) if content_hash else None
+    if counter is None or counter.max_n < max_n:
+        sentences = iter_sentences(stream, max_bytes=max_bytes)
+        counter = count_ngrams(sentences, max_n, workers=workers)  # Normalize and count n-grams
+        if content_hash:
+            ngram_cache.set(content_hash, counter)
+    return counter, content_hash
+
+def procesar_stream(
+        stream, 
+        num_tables : int = 5,
+        num_rows : int = 5, 
+        workers : int = 1, 
+        max_bytes : int = MAX_UPLOAD_BYTES) -> dict:
+    """
+    Function to process an uploaded file as a stream: the bytes are decoded and split into sentences 
+    incrementally and the n-grams are counted as the sentences arrive, so the whole text is never held 
+    in memory. Repeated uploads of the same content are answered from 'ngram_cache'.
+    
+    Args:
+    - stream: Binary file-like object, e.g. an uploaded file.
+    - num_tables (int): Number of n-gram tables to generate (default is 5).
+    - num_rows (int): Number of rows per table in the output DataFrame (default is 5).
+    - workers (int): Number of worker processes, 1 for serial mode (default is 1).
+    - max_bytes (int): Maximum number of bytes accepted (default is MAX_UPLOAD_BYTES, None for no limit).
+    
+    Returns:
+    - dict: Dictionary containing n-gram tables for each n value.
+    """
+    assert isinstance(num_tables, int), "The 'num_tables' must be an integer"
+    assert isinstance(num_rows, int), "The 'num_rows' must be an integer"
+
+    counter, _ = get_ngram_counts(stream, max(num_tables, 1), workers=workers, max_bytes=max_bytes)
+    return build_results(counter, num_tables, num_rows)
+
+def procesar_ruta(
+        path : str, 
+        num_tables : int = 5,
+        num_rows : int = 5, 
+        workers : int = None, 
+        max_bytes : int = MAX_UPLOAD_BYTES) -> dict:
+    """
+    Function to process an upload saved to disk, e.g. from a background job, reporting the share of the 
+    file read as job progress (see 'procesar_stream').
+    
+    Args:
+    - path (str): Path of the text file.
+    - num_tables (int): Number of n-gram tables to generate (default is 5).
+    - num_rows (int): Number of rows per table in the output DataFrame (default is 5).
+    - workers (int): Number of worker processes (default is None: chosen from the file size with 'default_workers').
+    - max_bytes (int): Maximum number of bytes accepted (default is MAX_UPLOAD_BYTES, None for no limit).
+    
+    Returns:
+    - dict: Dictionary containing n-gram tables for each n value.
+    """
+    size = os.path.getsize(path)
+    if workers is None:
+        workers = default_workers(size)
+    with open(path, 'rb') as f:
+        # The file is read twice, once to hash it for the cache and once to count it
+        stream = ProgressReader(f, 2 * size, end=0.95, message='Counting n-grams')
+        return procesar_stream(stream, num_tables, num_rows, workers=workers, max_bytes=max_bytes)
 
 def procesar_archivo(
         data : str, 
         num_tables : int = 5,
-        num_rows : int = 5) -> dict:
+        num_rows : int = 5, 
+        workers : int = None) -> dict:
     """
     Function to process a text file or string by tokenizing sentences, normalizing them,
     and generating top n-grams for each n value specified.
@@ -100,6 +592,8 @@ def procesar_archivo(
     - data (str): Input text data to be processed.
     - num_tables (int): Number of n-gram tables to generate (default is 5).
     - num_rows (int): Number of rows per table in the output DataFrame (default is 5).
+    - workers (int): Number of worker processes (default is None: one per CPU for texts of at least 
+      PARALLEL_MIN_CHARS characters, serial otherwise).
     
     Returns:
     - dict: Dictionary containing n-gram tables for each n value.
@@ -108,14 +602,11 @@ def procesar_archivo(
     assert isinstance(num_tables, int), "The 'num_tables' must be an integer"
     assert isinstance(num_rows, int), "The 'num_rows' must be an integer"
 
-    nltk.download('punkt', quiet=True)  # Download NLTK punkt tokenizer
+    require_resources()  # Fail fast if the NLTK tokenizer or stopwords are not installed
     
     sentences = nltk.sent_tokenize(data)  # Tokenize text into sentences
-    normalized_sentences = [text_normalizer(sentence) for sentence in tqdm(sentences)]  # Normalize each sentence
-    
-    results = {}
-    for num in range(1, num_tables + 1):
-        tempData = top_ngrams(corpus=normalized_sentences, ngram_val=num, limit=10, rows_per_table=num_rows)
-        results[f"N-Gram Value: {num}"] = tempData  # Store n-gram table in results dictionary
+    if workers is None:
+        workers = default_workers(len(data))
+    counter = count_ngrams(sentences, max(num_tables, 1), workers=workers)  # Normalize and count n-grams
     
-    return results  # Return the dictionary containing all n-gram tables
+    return build_results(counter, num_tables, num_rows)  # Return the dictionary containing all n-gram tables
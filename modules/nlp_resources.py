@@ -0,0 +1,97 @@
+# Import necessary libraries
+import nltk
+import threading
+import textblob as tb
+from functools import lru_cache
+
+# NLTK resources used by the app: resource name -> path searched with nltk.data.find
+required_resources = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+}
+
+class NLPResourceError(RuntimeError):
+    """Raised when an NLP resource needed by a request is not installed."""
+
+# Outcome of the warm-up: None until it runs, then the error that made it fail or False if it succeeded
+_warm_up_error = None
+_warm_up_lock = threading.Lock()
+
+def missing_resources() -> list:
+    """
+    Function to list the required NLTK resources that are not installed.
+
+    Returns:
+    - list: Names of the missing resources, to be installed with 'python -m nltk.downloader <name>'.
+    """
+    missing = []
+    for name, path in required_resources.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(name)
+    return missing
+
+@lru_cache(maxsize=None)
+def get_stopwords(language : str = 'english') -> frozenset:
+    """
+    Function to get the stopwords of a language as a frozenset, loading the corpus only once per language.
+
+    Args:
+    - language (str): Language of the stopword list (default is 'english').
+
+    Returns:
+    - frozenset: Stopwords of the language.
+    """
+    assert isinstance(language, str), "The 'language' must be a string"
+
+    if language not in available_languages():
+        raise NLPResourceError(f"There are no stopwords for '{language}'. Available languages: {', '.join(available_languages())}")
+    return frozenset(nltk.corpus.stopwords.words(language))
+
+@lru_cache(maxsize=None)
+def available_languages() -> tuple:
+    """
+    Function to list the languages with a stopword list installed.
+    """
+    return tuple(nltk.corpus.stopwords.fileids())
+
+def warm_up() -> None:
+    """
+    Function to check and load every NLP resource once per process: the punkt sentence tokenizer, the
+    stopword lists of every installed language and the TextBlob sentiment lexicon. It never downloads
+    anything; if a resource is missing the error is remembered and raised by 'require_resources'.
+
+    It is called at app start and can be used as the 'initializer' of worker pools (or from a gunicorn
+    'post_worker_init' hook) so workers start with the resources already in memory.
+    """
+    global _warm_up_error
+
+    with _warm_up_lock:
+        if _warm_up_error is not None:
+            return
+        try:
+            missing = missing_resources()
+            if missing:
+                raise NLPResourceError(
+                    f"Missing NLTK resources: {', '.join(missing)}. "
+                    f"Install them with: python -m nltk.downloader {' '.join(missing)}")
+            nltk.sent_tokenize('Warm up the tokenizer. Load punkt.')  # Loads the punkt model
+            for language in available_languages():
+                get_stopwords(language)
+            tb.TextBlob('warm up the sentiment lexicon').sentiment  # Loads the TextBlob lexicon
+            _warm_up_error = False
+        except Exception as e:
+            print(f"Error loading NLP resources: {e}")
+            _warm_up_error = e if isinstance(e, NLPResourceError) else NLPResourceError(str(e))
+
+def require_resources() -> None:
+    """
+    Function to call at the start of a request that needs NLP resources. It warms up the process on the
+    first call and afterwards only checks the cached outcome, raising NLPResourceError right away if the
+    resources could not be loaded instead of trying to download them mid-request.
+    """
+    if _warm_up_error is None:
+        warm_up()
+    if _warm_up_error:
+        raise _warm_up_error
@@ -1,11 +1,14 @@
 # Import necessary libraries
-import matplotlib, os
+import matplotlib, os, io, json, base64, hashlib, threading
+from concurrent.futures import ThreadPoolExecutor
 matplotlib.use('Agg')  # Use 'Agg' backend to save plots without displaying them
 
 import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+from modules.cache import PersistentCache
+from modules.jobs import in_job, report_progress
 
 def forecasting(
         serie : pd.Series, 
@@ -29,55 +32,245 @@ def forecasting(
     else:
         return print("The length of the serie does not match its periodicity.")
             
-    ones = [1] * len(serie)
-    pastPeriods = np.arange(1, len(serie) + 1)
-    nextPeriod = np.arange(pastPeriods[-1] + 1, pastPeriods[-1] + 1 + periodicity)
-    periods = np.arange(1, periodicity + 1, 1).tolist() * int(pastPeriods[-1] / periodicity)
-    periods = periods[int(periodicity / 2) : -int(periodicity / 2)]
-    
-    serie_cma = serie.rolling(periodicity).mean().dropna().rolling(2).mean().dropna()
-    irr_seas_comp = serie[int(periodicity / 2) : -int(periodicity / 2)].values.ravel() / serie_cma.values.ravel()
-    seas_index = pd.concat([pd.Series(irr_seas_comp), pd.Series(periods)], axis = 1, keys = ['IRREGULAR_SEASONAL_COMPONENTS', 'PERIOD']).groupby('PERIOD')['IRREGULAR_SEASONAL_COMPONENTS'].mean()
-    adj_seas_index = seas_index / np.mean(seas_index.values)
-    adj_seas_index = adj_seas_index.tolist() * int(pastPeriods[-1] / periodicity)
-    unseas_serie = serie.values.ravel() / adj_seas_index
-    X, y = np.array([ones, pastPeriods]).T, unseas_serie # Data separation
-    
-    # Linear regression to fit unseasonal sales
-    b = np.linalg.inv(X.T.dot(X)).dot(X.T).dot(y)
-    future_unseasonal_serie = b[0] + b[1] * nextPeriod
-    forecast = future_unseasonal_serie * adj_seas_index[ : periodicity]
+    forecast = batch_forecasting(serie.values.ravel(), periodicity=periodicity)
     forecast = [round(float(elem),2) for elem in forecast]
 
     return forecast
 
+def batch_forecasting(
+        series : np.ndarray, 
+        periodicity : int = 4) -> np.ndarray:
+    """
+    Vectorized version of 'forecasting' that predicts the next cycle of many series sharing the same 
+    periodicity in a single pass.
+
+    Every column is decomposed at once: the centered moving averages come from a cumulative sum, the 
+    seasonal indices from a reshape into (cycles, periodicity, series), and the trend of the deseasonalized 
+    series from the closed-form least squares sums, without any matrix inversion or per-column loop.
+
+    Args:
+    - series: 2-D array (observations x series), wide DataFrame (one column per series) or 1-D array / Series
+    - periodicity: Integer representing the number of periods in the seasonal cycle
+
+    Returns:
+    - forecast: Array of shape (periodicity, number of series) with the predicted values for the next cycle, 
+      a DataFrame with the same columns for DataFrame inputs, or a 1-D array for 1-D inputs
+    """
+    assert isinstance(series, (np.ndarray, pd.DataFrame, pd.Series)), "The 'series' must be a NumPy array or a Pandas DataFrame or Series"
+    assert isinstance(periodicity, int) and periodicity > 1, "The 'periodicity' must be an integer greater than 1"
+
+    values = np.asarray(series, dtype=float)
+    is_1d = values.ndim == 1
+    if is_1d:
+        values = values[:, None]
+    assert values.ndim == 2, "The 'series' must have one or two dimensions"
+
+    assert len(values) % periodicity == 0, "The length of the series does not match its periodicity"
+    assert len(values) >= 2 * periodicity, "The series must contain at least two cycles"
+
+    cumsum = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    forecast = _forecast_from_cumsum(values, cumsum, periodicity)
+
+    if is_1d:
+        return forecast[:, 0]
+    if isinstance(series, pd.DataFrame):
+        return pd.DataFrame(forecast, columns=series.columns, index=pd.RangeIndex(1, periodicity + 1, name='Period'))
+    return forecast
+
+def _forecast_from_cumsum(
+        values : np.ndarray, 
+        cumsum : np.ndarray, 
+        periodicity : int) -> np.ndarray:
+    """
+    Helper function that forecasts the next cycle of every column of 'values' given its cumulative sum 
+    (with a leading row of zeros), so callers can share one cumulative sum between several windows.
+    """
+    adj_seas_index = seasonal_indices(values, cumsum, periodicity)
+    return trend_forecast(values, adj_seas_index, periodicity)
+
+def seasonal_indices(
+        values : np.ndarray, 
+        cumsum : np.ndarray, 
+        periodicity : int) -> np.ndarray:
+    """
+    Function to compute the adjusted seasonal indices of every column of 'values' (the decomposition step).
+
+    Args:
+    - values: 2-D array (observations x series) whose length is a multiple of the periodicity
+    - cumsum: Cumulative sum of 'values' along the observations, with a leading row of zeros
+    - periodicity: Integer representing the number of periods in the seasonal cycle
+
+    Returns:
+    - adj_seas_index: Array of shape (periodicity, number of series) whose columns average to one
+    """
+    n_obs, n_series = values.shape
+    n_cycles = n_obs // periodicity
+    half = periodicity // 2
+
+    # Centered moving average: a periodicity-long mean, averaged again in pairs when the periodicity is even
+    moving_average = (cumsum[periodicity:] - cumsum[:-periodicity]) / periodicity
+    if periodicity % 2 == 0:
+        moving_average = (moving_average[:-1] + moving_average[1:]) / 2
+
+    # Seasonal indices: mean irregular-seasonal component of every position of the cycle
+    irr_seas_comp = np.full((n_obs, n_series), np.nan)
+    irr_seas_comp[half : n_obs - half] = values[half : n_obs - half] / moving_average
+    seas_index = np.nanmean(irr_seas_comp.reshape(n_cycles, periodicity, n_series), axis=0)
+    return seas_index / seas_index.mean(axis=0)
+
+def trend_forecast(
+        values : np.ndarray, 
+        adj_seas_index : np.ndarray, 
+        periodicity : int) -> np.ndarray:
+    """
+    Function to fit the linear trend of the deseasonalized columns of 'values' and forecast the next cycle 
+    (the regression step), using the closed-form least squares sums.
+
+    Args:
+    - values: 2-D array (observations x series) whose length is a multiple of the periodicity
+    - adj_seas_index: Adjusted seasonal indices returned by 'seasonal_indices'
+    - periodicity: Integer representing the number of periods in the seasonal cycle
+
+    Returns:
+    - forecast: Array of shape (periodicity, number of series) with the predicted values for the next cycle
+    """
+    n_obs, n_series = values.shape
+    n_cycles = n_obs // periodicity
+
+    unseas_series = (values.reshape(n_cycles, periodicity, n_series) / adj_seas_index).reshape(n_obs, n_series)
+    past_periods = np.arange(1, n_obs + 1, dtype=float)
+    centered_periods = past_periods - past_periods.mean()
+    slope = centered_periods.dot(unseas_series) / centered_periods.dot(centered_periods)
+    intercept = unseas_series.mean(axis=0) - slope * past_periods.mean()
+
+    next_periods = np.arange(n_obs + 1, n_obs + 1 + periodicity, dtype=float)
+    return (intercept + slope * next_periods[:, None]) * adj_seas_index
+
+def batch_holdout_forecasting(
+        series : pd.DataFrame, 
+        periodicity : int = 4, 
+        max_workers : int = None) -> tuple:
+    """
+    Function to forecast both the last cycle (holding it out of the fit) and the next cycle of every column 
+    of a wide DataFrame, splitting the columns across a thread pool.
+
+    Both forecasts of a column share the same cumulative sum: the holdout window is a prefix of the full 
+    series, so its moving averages are read from the same array instead of being recomputed.
+
+    Args:
+    - series: Wide DataFrame with one numeric column per series
+    - periodicity: Integer representing the number of periods in the seasonal cycle
+    - max_workers: Maximum number of threads, each one forecasting a block of columns (default is one per CPU, one inside a background job)
+
+    Returns:
+    - forecasts: Tuple of two DataFrames (last cycle, next cycle), indexed by period and with one column per series
+    """
+    assert isinstance(series, pd.DataFrame), "The 'series' must be a Pandas DataFrame"
+    assert isinstance(periodicity, int) and periodicity > 1, "The 'periodicity' must be an integer greater than 1"
+    assert len(series) % periodicity == 0, "The length of the series does not match its periodicity"
+    assert len(series) >= 3 * periodicity, "The series must contain at least three cycles"
+
+    values = series.to_numpy(dtype=float)
+    max_workers = max_workers or (1 if in_job() else os.cpu_count() or 1)
+    blocks = [block for block in np.array_split(np.arange(values.shape[1]), max_workers) if len(block)]
+
+    def forecast_block(columns):
+        """Helper function to forecast the holdout and next cycles of a block of columns."""
+        block = values[:, columns]
+        cumsum = np.concatenate([np.zeros((1, block.shape[1])), np.cumsum(block, axis=0)])
+        last_cycle = _forecast_from_cumsum(block[:-periodicity], cumsum[:-periodicity], periodicity)
+        next_cycle = _forecast_from_cumsum(block, cumsum, periodicity)
+        return last_cycle, next_cycle
+
+    with ThreadPoolExecutor(max_workers=len(blocks)) as executor:
+        results = list(executor.map(forecast_block, blocks))
+
+    index = pd.RangeIndex(1, periodicity + 1, name='Period')
+    last_cycle = pd.DataFrame(np.hstack([result[0] for result in results]), columns=series.columns, index=index)
+    next_cycle = pd.DataFrame(np.hstack([result[1] for result in results]), columns=series.columns, index=index)
+    return last_cycle, next_cycle
+
+# Cache of rendered plots keyed by a hash of the series and its periodicity. It is kept on disk 
+# (SEASONALITY_CACHE_DIR) so the job workers, each with its own memory, share every plot
+plot_cache = PersistentCache(
+    max_entries=32, 
+    max_bytes=64 * 1024 * 1024, 
+    cache_dir=os.environ.get('SEASONALITY_CACHE_DIR', os.path.join('cache', 'seasonality')))
+
+# pyplot keeps global state, so plots are drawn one request at a time
+plot_lock = threading.Lock()
+
+def series_key(
+        serie : pd.Series, 
+        periodicity : int) -> str:
+    """
+    Function to compute a content hash identifying a series and its periodicity.
+
+    Args:
+    - serie: Time series data as a pandas Series
+    - periodicity: Integer representing the number of periods in the seasonal cycle
+
+    Returns:
+    - key: Hexadecimal SHA-1 digest of the values and the periodicity
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(serie.to_numpy(dtype=float)).tobytes())
+    digest.update(str(periodicity).encode('utf-8'))
+    return digest.hexdigest()
+
+def figure_to_data_uri(fig : plt.Figure) -> str:
+    """
+    Function to render a matplotlib figure into an in-memory PNG and return it as a base64 data URI.
+    """
+    img = io.BytesIO()
+    fig.savefig(img, format='png')
+    plt.close(fig)
+    img_base64 = base64.b64encode(img.getvalue()).decode('utf-8')
+    return f"data:image/png;base64,{img_base64}"
+
 def generate_plots(
         serie : pd.Series, 
         prediction_last_period : list, 
         prediction_next_period : list, 
-        periodicity : int = 4) -> None:
+        periodicity : int = 4) -> dict:
     """
-    Function to generate and save plots of the original data, last period prediction, and next period prediction.
+    Function to generate plots of the original data, last period prediction, and next period prediction.
+    The plots are rendered in memory and cached by 'series_key', so repeated uploads of the same series 
+    are served without plotting again and no files are shared between requests.
 
     Args:
-    - serie: Time series data as a pandas DataFrame
+    - serie: Time series data as a pandas Series
     - prediction_last_period: Predicted values for the last period
     - prediction_next_period: Predicted values for the next period
     - periodicity: Integer representing the number of periods in the seasonal cycle
 
     Returns:
-    - Plots saved as PNG files in the 'static/temp_images' directory
+    - plots: Dictionary mapping the plot names ('original_data', 'all_periods_data', 
+      'historic_and_prediction_data') to base64-encoded PNG data URIs
     """
     assert isinstance(serie, pd.Series), "The 'serie' must be a Pandas Series"
     assert isinstance(prediction_last_period, list), "The 'prediction_last_period' must be a list"
     assert isinstance(prediction_next_period, list), "The 'prediction_next_period' must be a list"
     assert isinstance(periodicity, int), "The 'periodicity' must be an integer"
 
-    # Create directory if it doesn't exist
-    save_dir = 'static/seasonality_prediction'
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
-    
+    return plot_cache.get_or_set(
+        series_key(serie, periodicity), 
+        lambda: render_plots(serie, prediction_last_period, prediction_next_period, periodicity))
+
+def render_plots(
+        serie : pd.Series, 
+        prediction_last_period : list, 
+        prediction_next_period : list, 
+        periodicity : int = 4) -> dict:
+    """
+    Function that draws the plots of 'generate_plots' without going through the cache.
+    """
+    with plot_lock:
+        return _draw_plots(serie, prediction_last_period, prediction_next_period, periodicity)
+
+def _draw_plots(serie, prediction_last_period, prediction_next_period, periodicity):
+    """Helper function holding the pyplot calls of 'render_plots'."""
+    plots = {}
+
     # Plot original data
     plt.figure(figsize=(10,5))
     sns.lineplot(np.concatenate([
@@ -87,8 +280,7 @@ def generate_plots(
     plt.xticks([])
     plt.ylabel("Value".title(), fontsize=15)
     plt.title("Original Data".title(), fontsize=20)
-    plt.savefig(os.path.join(save_dir, 'original_data.png'))
-    plt.close()
+    plots['original_data'] = figure_to_data_uri(plt.gcf())
 
     # Plot last cycle   
     plt.figure(figsize=(10,5))
@@ -119,8 +311,7 @@ def generate_plots(
     plt.suptitle("Last Period Prediction".title(),fontsize=20)
     plt.tight_layout()
 
-    plt.savefig(os.path.join(save_dir, 'all_periods_data.png'))
-    plt.close()
+    plots['all_periods_data'] = figure_to_data_uri(plt.gcf())
 
     # Plot next cycle
     plt.figure(figsize=(10,5))
@@ -139,5 +330,175 @@ def generate_plots(
     plt.xticks([])
     plt.ylabel("Value".title(), fontsize=15)
     plt.title("original Data and Next Period Prediction".title(), fontsize=20)  
-    plt.savefig(os.path.join(save_dir, 'historic_and_prediction_data.png'))
-    plt.close()
+    plots['historic_and_prediction_data'] = figure_to_data_uri(plt.gcf())
+
+    return plots
+
+def forecast_file(
+        path : str, 
+        periodicity : int) -> dict:
+    """
+    Function to forecast every numeric column of an Excel file and plot the first one, meant to run as a 
+    background job (it reports its progress).
+    
+    Args:
+    - path (str): Path of the Excel file; fully empty rows are ignored.
+    - periodicity (int): Number of observations per seasonal cycle.
+    
+    Returns:
+    - dict: The next cycle forecast of every column ('forecast'), the plotted column ('plotted_series') 
+      and its plots ('plots'), as rendered by the seasonality template.
+    """
+    report_progress(0.05, 'Reading file')
+    series = pd.read_excel(path).select_dtypes('number').dropna(how='all')
+    if series.empty or series.isna().any().any():
+        raise ValueError("The file must have numeric columns without missing values")
+
+    # Holdout and next cycle forecasts of every column, computed in parallel
+    report_progress(0.3, 'Forecasting')
+    forecast_last_period, forecast_next_period = batch_holdout_forecasting(series, periodicity=periodicity)
+    forecast_last_period = forecast_last_period.round(2)
+    forecast_next_period = forecast_next_period.round(2)
+
+    # Plot the first series, rendered in memory
+    report_progress(0.7, 'Plotting')
+    col_name = series.columns[0]
+    plots = generate_plots(
+        series[col_name],
+        forecast_last_period[col_name].tolist(), 
+        forecast_next_period[col_name].tolist(), 
+        periodicity)
+    return {'forecast': forecast_next_period, 'plotted_series': col_name, 'plots': plots}
+
+class IncrementalForecaster:
+    """
+    Online version of 'forecasting' that is updated one observation at a time.
+
+    Instead of the full series it keeps a window with the last periodicity + 1 observations (enough to 
+    compute one new centered moving average), running sums of the irregular-seasonal components per 
+    position of the cycle, and running sums of the observations and of period * observation per position 
+    of the cycle. Deseasonalizing only rescales each position of the cycle, so those sums give the least 
+    squares trend of the deseasonalized series for the current seasonal indices. Appending an observation 
+    and forecasting both cost O(periodicity), and on series whose length is a multiple of the periodicity 
+    the forecast equals the one of 'forecasting'.
+    """
+
+    def __init__(self, periodicity : int = 4) -> None:
+        """
+        Args:
+        - periodicity: Integer representing the number of periods in the seasonal cycle
+        """
+        assert isinstance(periodicity, int) and periodicity > 1, "The 'periodicity' must be an integer greater than 1"
+
+        self.periodicity = periodicity
+        self.n_obs = 0
+        self.window = []  # Last periodicity + 1 observations
+        self.irr_seas_sum = np.zeros(periodicity)
+        self.irr_seas_count = np.zeros(periodicity, dtype=int)
+        self.value_sum = np.zeros(periodicity)
+        self.period_value_sum = np.zeros(periodicity)
+
+        # Weights of the centered moving average over the window, the oldest observation first
+        if periodicity % 2 == 0:
+            self.weights = np.full(periodicity + 1, 1 / periodicity)
+            self.weights[[0, -1]] = 1 / (2 * periodicity)
+        else:
+            self.weights = np.full(periodicity, 1 / periodicity)
+
+    def update(self, values) -> 'IncrementalForecaster':
+        """
+        Appends one observation or an iterable of observations to the series.
+
+        Args:
+        - values: Number or iterable of numbers, in chronological order
+
+        Returns:
+        - self, so calls can be chained
+        """
+        for value in np.atleast_1d(np.asarray(values, dtype=float)):
+            position = self.n_obs % self.periodicity
+            self.n_obs += 1
+            self.value_sum[position] += value
+            self.period_value_sum[position] += self.n_obs * value
+
+            self.window.append(float(value))
+            self.window = self.window[-len(self.weights):]
+            if len(self.window) == len(self.weights):
+                # The new observation completes the centered moving average of the middle of the window
+                center = self.n_obs - 1 - self.periodicity // 2
+                moving_average = float(np.dot(self.weights, self.window))
+                self.irr_seas_sum[center % self.periodicity] += self.window[self.periodicity // 2] / moving_average
+                self.irr_seas_count[center % self.periodicity] += 1
+        return self
+
+    def seasonal_indices(self) -> np.ndarray:
+        """
+        Returns the adjusted seasonal indices of every position of the cycle, averaging to one.
+        """
+        assert self.irr_seas_count.all(), "At least two cycles are needed to estimate the seasonal indices"
+
+        seas_index = self.irr_seas_sum / self.irr_seas_count
+        return seas_index / seas_index.mean()
+
+    def forecast(self) -> list:
+        """
+        Returns the predicted values of the next cycle, rounded like 'forecasting'.
+        """
+        adj_seas_index = self.seasonal_indices()
+
+        # Least squares sums of the deseasonalized series, obtained by rescaling each position of the cycle
+        n_obs = self.n_obs
+        unseas_sum = np.sum(self.value_sum / adj_seas_index)
+        period_unseas_sum = np.sum(self.period_value_sum / adj_seas_index)
+        mean_period = (n_obs + 1) / 2
+        slope = (period_unseas_sum - mean_period * unseas_sum) / (n_obs * (n_obs ** 2 - 1) / 12)
+        intercept = unseas_sum / n_obs - slope * mean_period
+
+        next_periods = np.arange(n_obs + 1, n_obs + 1 + self.periodicity)
+        forecast = (intercept + slope * next_periods) * adj_seas_index[(next_periods - 1) % self.periodicity]
+        return [round(float(elem), 2) for elem in forecast]
+
+    def to_dict(self) -> dict:
+        """
+        Returns the state of the forecaster as a JSON-serializable dictionary.
+        """
+        return {
+            'periodicity': self.periodicity,
+            'n_obs': self.n_obs,
+            'window': self.window,
+            'irr_seas_sum': self.irr_seas_sum.tolist(),
+            'irr_seas_count': self.irr_seas_count.tolist(),
+            'value_sum': self.value_sum.tolist(),
+            'period_value_sum': self.period_value_sum.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state : dict) -> 'IncrementalForecaster':
+        """
+        Rebuilds a forecaster from the dictionary returned by 'to_dict'.
+        """
+        assert isinstance(state, dict), "The 'state' must be a dictionary"
+
+        forecaster = cls(periodicity=int(state['periodicity']))
+        forecaster.n_obs = int(state['n_obs'])
+        forecaster.window = [float(value) for value in state['window']]
+        forecaster.irr_seas_sum = np.array(state['irr_seas_sum'], dtype=float)
+        forecaster.irr_seas_count = np.array(state['irr_seas_count'], dtype=int)
+        forecaster.value_sum = np.array(state['value_sum'], dtype=float)
+        forecaster.period_value_sum = np.array(state['period_value_sum'], dtype=float)
+        return forecaster
+
+    def save(self, path : str) -> None:
+        """
+        Saves the state of the forecaster as a JSON file.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path : str) -> 'IncrementalForecaster':
+        """
+        Loads a forecaster saved with 'save'.
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
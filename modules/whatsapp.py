@@ -1,20 +1,115 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import io, re, nltk
+from wordcloud import WordCloud, STOPWORDS
+import os, io, re, uuid, codecs, multiprocessing
 import base64
 from unidecode import unidecode
 import textblob as tb
+from functools import lru_cache
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from modules.nlp_resources import get_stopwords, warm_up
+from modules.cache import PersistentCache
+from modules.jobs import ProgressReader, in_job, report_progress, JOB_START_METHOD
+
+# Chats with at least this many distinct messages are scored by a pool of worker processes
+SENTIMENT_PARALLEL_MIN_MESSAGES = 50000
+
+# Number of distinct messages scored per task in parallel mode
+SENTIMENT_BATCH_SIZE = 5000
+
+# Parsed chats of the uploads, by session id. Set WHATSAPP_SESSION_DIR to a shared folder when running
+# several workers so any of them can serve a dashboard
+chat_sessions = PersistentCache(
+    max_entries=16, 
+    max_bytes=1024 * 1024 * 1024, 
+    ttl=60 * 60, 
+    cache_dir=os.environ.get('WHATSAPP_SESSION_DIR'))
+
+def create_chat_session(state : dict) -> str:
+    """
+    Store the parsed data of an upload under a new session id.
+    
+    Parameters:
+    - state (dict): The data needed to draw the dashboard of the upload.
+    
+    Returns:
+    - str: The session id, to be passed to the dashboard.
+    """
+    assert isinstance(state, dict), "The 'state' must be a dictionary"
+
+    session_id = uuid.uuid4().hex
+    chat_sessions.set(session_id, state)
+    return session_id
+
+def get_chat_session(session_id : str) -> dict:
+    """
+    Get the data stored for a session id.
+    
+    Parameters:
+    - session_id (str): The id returned by 'create_chat_session'.
+    
+    Returns:
+    - dict: The stored data, or None if the session does not exist or has expired.
+    """
+    if not session_id:
+        return None
+    return chat_sessions.get(session_id)
+
+@lru_cache(maxsize=100000)
+def message_polarity(message : str) -> float:
+    """
+    Get the TextBlob sentiment polarity of a message, memoized so frequent messages ('ok', 'jaja') 
+    are scored only once per process.
+    """
+    return tb.TextBlob(message.replace('\n', ' ')).sentiment.polarity
+
+def score_batch(messages : list) -> list:
+    """
+    Get the polarity of every message of a batch (one task of 'score_messages' in parallel mode).
+    """
+    return [message_polarity(message) for message in messages]
+
+def score_messages(
+        messages : pd.Series, 
+        workers : int = None) -> np.ndarray:
+    """
+    Compute the sentiment polarity of every message, scoring each distinct message only once. 
+    
+    Parameters:
+    - messages (pd.Series): The messages to score.
+    - workers (int): Number of worker processes, 1 for serial mode (optional, one per CPU from 
+      SENTIMENT_PARALLEL_MIN_MESSAGES distinct messages on if None, serial inside a background job).
+    
+    Returns:
+    - np.ndarray: The polarity of each message, in the order of 'messages'.
+    """
+    assert isinstance(messages, pd.Series), "The 'messages' must be a Pandas Series"
+
+    codes, unique_messages = pd.factorize(messages)
+    if workers is None:
+        parallel = len(unique_messages) >= SENTIMENT_PARALLEL_MIN_MESSAGES and not in_job()
+        workers = (os.cpu_count() or 1) if parallel else 1
+
+    if workers > 1:
+        batches = [unique_messages[start:start + SENTIMENT_BATCH_SIZE].tolist() 
+                   for start in range(0, len(unique_messages), SENTIMENT_BATCH_SIZE)]
+        context = multiprocessing.get_context(JOB_START_METHOD)  # Never fork the app with its threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=warm_up) as executor:
+            scores = [score for batch in executor.map(score_batch, batches) for score in batch]
+    else:
+        scores = score_batch(unique_messages.tolist())
+    return np.asarray(scores, dtype=float)[codes]
 
 def sentiment_analysis(
         data : pd.DataFrame, 
         selected_issuer : str = None) -> go.Figure:
     """
     Perform sentiment analysis on the provided dataset. If a specific issuer is selected, 
-    the function filters the dataset by that issuer. The sentiment polarity is calculated 
-    using TextBlob for each message, and a violin plot is generated to visualize the sentiment 
-    distribution.
+    the function filters the dataset by that issuer. The sentiment polarity is taken from the 
+    'score' column computed at upload (or calculated with 'score_messages' if it is missing), 
+    and a violin plot is generated to visualize the sentiment distribution.
     
     Parameters:
     - data (pd.DataFrame): The input data containing messages and issuer information.
@@ -28,19 +123,17 @@ def sentiment_analysis(
     # assert isinstance(selected_issuer, str), "The 'selected_issuer' must be a string"
 
     if selected_issuer and selected_issuer != "GENERAL":
-        filtered_data = data[data['ISSUER'] == selected_issuer]
-    else:
-        filtered_data = data.copy()
+        data = data[data['ISSUER'] == selected_issuer]
 
-    filtered_data['score'] = filtered_data['MESSAGE'].apply(lambda a: tb.TextBlob(a.replace('\n',' ')).sentiment.polarity)
-    if filtered_data[filtered_data['score'] != 0].shape[0] == 0:
+    scores = data['score'] if 'score' in data else pd.Series(score_messages(data['MESSAGE']), index=data.index)
+    if not (scores != 0).any():
         return {'data': [], 'layout': go.Layout(title='Sentiment Analysis', showlegend=False)}
 
-    mean_score = round(filtered_data['score'].mean() * 100, 2)
+    mean_score = round(scores.mean() * 100, 2)
 
     fig = go.Figure()
     fig.add_trace(go.Violin(
-        y=filtered_data['score'],
+        y=scores,
         box_visible=True,
         line_color='black',
         meanline_visible=True,
@@ -58,6 +151,16 @@ def sentiment_analysis(
 
     return fig
 
+def wordcloud_to_data_uri(wordcloud : WordCloud) -> str:
+    """
+    Encode a generated word cloud as a base64 PNG data URI.
+    """
+    img = io.BytesIO()
+    wordcloud.to_image().save(img, format='png')
+    img.seek(0)
+    img_base64 = base64.b64encode(img.getvalue()).decode('utf-8')
+    return f"data:image/png;base64,{img_base64}"
+
 def generate_wordcloud(text : str) -> str:
     """
     Generate a word cloud from the input text and return it as a base64-encoded image.
@@ -71,11 +174,295 @@ def generate_wordcloud(text : str) -> str:
     assert isinstance(text, str), "The 'text' must be a string"
 
     wordcloud = WordCloud(width=800, height=400, background_color ='white').generate(text)
-    img = io.BytesIO()
-    wordcloud.to_image().save(img, format='png')
-    img.seek(0)
-    img_base64 = base64.b64encode(img.getvalue()).decode('utf-8')
-    return f"data:image/png;base64,{img_base64}"
+    return wordcloud_to_data_uri(wordcloud)
+
+def generate_wordcloud_from_frequencies(frequencies : dict) -> str:
+    """
+    Generate a word cloud from precomputed word frequencies and return it as a base64-encoded image.
+    
+    Parameters:
+    - frequencies (dict): Word -> number of occurrences (see 'build_word_frequencies').
+    
+    Returns:
+    - str: A base64-encoded string representing the word cloud image, or an empty string if there are no words.
+    """
+    assert isinstance(frequencies, dict), "The 'frequencies' must be a dictionary"
+
+    if not frequencies:
+        return ''
+    wordcloud = WordCloud(width=800, height=400, background_color ='white').generate_from_frequencies(frequencies)
+    return wordcloud_to_data_uri(wordcloud)
+
+# WordCloud.process_text rules (wordcloud 1.9, default options): words match this pattern, a trailing 
+# "'s" is removed, numbers and the WordCloud stopwords are dropped and plurals are merged into singulars
+word_regex = re.compile(r"\w[\w']*")
+wordcloud_stopwords = frozenset(word.lower() for word in STOPWORDS)
+url_regex = re.compile(r'http\S+')
+
+# Rendered word clouds by (session id, issuer, language)
+wordcloud_cache = PersistentCache(max_entries=256, ttl=60 * 60)
+
+@lru_cache(maxsize=100000)
+def normalize_word(word : str) -> tuple:
+    """
+    Get the words counted for a lowercase token that is not a stopword: the token without diacritics, 
+    split and filtered as WordCloud.process_text would, or nothing for URLs.
+    """
+    word = unidecode(word)
+    if url_regex.match(word):
+        return ()
+    words = []
+    for token in word_regex.findall(word):
+        if token.lower().endswith("'s"):
+            token = token[:-2]
+        if not token.isdigit() and token.lower() not in wordcloud_stopwords:
+            words.append(token)
+    return tuple(words)
+
+def count_words(
+        messages : pd.Series, 
+        stopword_list : frozenset) -> Counter:
+    """
+    Count the words of some messages after the normalization of 'text_normalizer', before plurals are 
+    merged. The raw tokens are counted first, so every distinct token is normalized only once.
+    """
+    frequencies = Counter()
+    for token, count in Counter(' '.join(messages).lower().split()).items():
+        if token not in stopword_list:
+            for word in normalize_word(token):
+                frequencies[word] += count
+    return frequencies
+
+def merge_plurals(frequencies : Counter) -> Counter:
+    """
+    Merge the count of every word ending in 's' (but not 'ss') into its singular when the singular 
+    is also counted, as WordCloud does.
+    """
+    merged = Counter(frequencies)
+    for word in list(merged):
+        if word.endswith('s') and not word.endswith('ss') and word[:-1] in merged:
+            merged[word[:-1]] += merged.pop(word)
+    return merged
+
+def word_frequencies(
+        messages : pd.Series, 
+        stopword_list : frozenset) -> Counter:
+    """
+    Count the words of some messages as WordCloud.generate would count their text normalized by 
+    'text_normalizer', except for collocations (bigrams), which depend on the whole text and are 
+    left out so counts of different issuers can be added up.
+    
+    Parameters:
+    - messages (pd.Series): The messages to count.
+    - stopword_list (frozenset): Lowercase words that are not counted.
+    
+    Returns:
+    - Counter: Word -> number of occurrences.
+    """
+    return merge_plurals(count_words(messages, stopword_list))
+
+def build_word_frequencies(
+        data : pd.DataFrame, 
+        language : str = 'english') -> dict:
+    """
+    Count the words of every issuer once per upload (see 'word_frequencies'), so word clouds can be 
+    drawn from the counts instead of normalizing the whole chat again on every dashboard change.
+    
+    Parameters:
+    - data (pd.DataFrame): The processed chat (see 'preprocess_whatsapp_data').
+    - language (str): The language for the stopword list (default is 'english').
+    
+    Returns:
+    - dict: Issuer (plus 'GENERAL' for the whole chat) -> Counter of words.
+    """
+    assert isinstance(data, pd.DataFrame), "The 'data' must be a Pandas DataFrame"
+    assert isinstance(language, str), "The 'language' must be a string"
+
+    stopword_list = get_stopwords(language)
+    counts = {issuer: count_words(messages, stopword_list) 
+              for issuer, messages in data.groupby('ISSUER')['MESSAGE']}
+    # Plurals are merged after adding up the issuers, since merging depends on the words of the whole chat
+    counts['GENERAL'] = sum(counts.values(), Counter())
+    return {issuer: merge_plurals(frequencies) for issuer, frequencies in counts.items()}
+
+def get_wordcloud(
+        session_id : str, 
+        issuer : str, 
+        start = None, 
+        end = None) -> str:
+    """
+    Get the word cloud of an issuer of an uploaded chat, cached by (session id, issuer, language, date range). 
+    The whole chat is drawn from the word frequencies of its session; a date range counts the words of 
+    its messages only.
+    
+    Parameters:
+    - session_id (str): The id returned by 'create_chat_session'.
+    - issuer (str): The issuer, or 'GENERAL' for the whole chat.
+    - start (str or datetime): First day of the range (optional, see 'filter_chat').
+    - end (str or datetime): Last day of the range, included (optional, see 'filter_chat').
+    
+    Returns:
+    - str: A base64-encoded string representing the word cloud image, or an empty string if there is no data.
+    """
+    session = get_chat_session(session_id)
+    if session is None or issuer not in session['words']:
+        return ''
+
+    def draw():
+        if start is None and end is None:
+            return generate_wordcloud_from_frequencies(session['words'][issuer])
+        window = filter_chat(session['chat'], start, end)
+        messages = window['MESSAGE'] if issuer == 'GENERAL' else window.loc[window['ISSUER'] == issuer, 'MESSAGE']
+        return generate_wordcloud_from_frequencies(word_frequencies(messages, get_stopwords(session['language'])))
+
+    return wordcloud_cache.get_or_set((session_id, issuer, session['language'], start, end), draw)
+
+# Start of a message line: "dd/mm/yy, HH:MM - ", only matched at the beginning of a line
+MESSAGE_START = r"\d{1,2}/\d{1,2}/\d{2,4}, \d{1,2}:\d{2}[^\n]*? - "
+# One message: date, hour, minute, what follows the minute (seconds, or the "a. m."/"PM" marker of 12-hour 
+# exports), issuer and text, followed by every continuation line up to the next message start
+message_regex = re.compile(
+    r"^(\d{1,2}/\d{1,2}/\d{2,4}), (\d{1,2}):(\d{2})([^\n]*?) - ([^:\n]+?): (.*(?:\n(?!" + MESSAGE_START + r").*)*)", 
+    re.MULTILINE)
+message_start_regex = re.compile(MESSAGE_START)
+# Date of a message line, to tell day-first from month-first exports
+message_date_regex = re.compile(r"^(\d{1,2}/\d{1,2}/\d{2,4}), \d{1,2}:\d{2}", re.MULTILINE)
+
+# Number of bytes read from an upload at a time; each chunk becomes one parsed batch
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+
+def infer_date_format(dates : list) -> str:
+    """
+    Get the explicit format of the dates of a chat, with a two or four digit year. The order of the day 
+    and the month follows the locale of the export: a first field above 12 means day-first, a second 
+    field above 12 month-first, and dates that never tell (e.g. only the first 12 days of each month 
+    in the sample) are read day-first.
+    
+    Parameters:
+    - dates (list): Dates as written in the chat, e.g. ['31/12/23', '1/1/24'] or ['12/31/2023'].
+    
+    Returns:
+    - str: The format to pass to pd.to_datetime.
+    """
+    fields = [date.split('/') for date in dates]
+    year = '%y' if fields and len(fields[0][2]) == 2 else '%Y'
+    if not any(int(first) > 12 for first, _, _ in fields) and any(int(second) > 12 for _, second, _ in fields):
+        return f'%m/%d/{year}'
+    return f'%d/%m/{year}'
+
+def to_24_hour(
+        hours : pd.Series, 
+        meridiems : pd.Series) -> pd.Series:
+    """
+    Convert the hours of 12-hour exports to the 24-hour clock, e.g. 1 "p. m." to 13 and 12 "AM" to 0. 
+    Hours without an "am"/"pm" marker are already on the 24-hour clock and are kept.
+    
+    Parameters:
+    - hours (pd.Series): The hours as written in the chat.
+    - meridiems (pd.Series): The text between the minute and the issuer of each message, e.g. " p. m.".
+    
+    Returns:
+    - pd.Series: The hours between 0 and 23.
+    """
+    meridiems = meridiems.str.lower().str.replace(r'[^a-z]', '', regex=True)
+    return hours.where(~meridiems.isin(['am', 'pm']), hours % 12 + 12 * (meridiems == 'pm'))
+
+def parse_messages(
+        text : str, 
+        date_format : str = None) -> pd.DataFrame:
+    """
+    Parse a block of WhatsApp chat text made of whole messages in a single pass of an anchored regex, 
+    which extracts the date, time, issuer and message of every record and keeps continuation lines 
+    with their message. System notices (no issuer) and multimedia placeholders are dropped.
+    
+    Parameters:
+    - text (str): Chat text, one or more complete messages.
+    - date_format (str): Format of the dates (optional, inferred from the dates of the block if None).
+    
+    Returns:
+    - pd.DataFrame: A DataFrame with columns for date, hour, sender (issuer), message, day of the week, 
+      day of the month, month, message length and timestamp (date and time to the minute).
+    """
+    assert isinstance(text, str), "The 'text' must be a string"
+
+    df_chat = pd.DataFrame(message_regex.findall(text), columns=['DATE', 'HOUR', 'MINUTE', 'MERIDIEM', 'ISSUER', 'MESSAGE'])
+    df_chat = df_chat[~df_chat['MESSAGE'].str.contains('Multimedia', regex=False)].reset_index(drop=True)
+    # The line break ending the file is not part of the last message
+    df_chat['MESSAGE'] = df_chat['MESSAGE'].str.rstrip('\n').str.replace('\n', ' ', regex=False)
+
+    if date_format is None and len(df_chat):
+        date_format = infer_date_format(df_chat['DATE'].tolist())
+    df_chat['DATE'] = pd.to_datetime(df_chat['DATE'], format=date_format)
+    df_chat['HOUR'] = to_24_hour(df_chat['HOUR'].astype(int), df_chat.pop('MERIDIEM'))
+    df_chat['dow'] = df_chat['DATE'].dt.dayofweek
+    df_chat['dom'] = df_chat['DATE'].dt.day
+    df_chat['month'] = df_chat['DATE'].dt.month
+    df_chat['len_message'] = pd.Series([len(message.split()) for message in df_chat['MESSAGE']], dtype='int64')
+    df_chat['TIMESTAMP'] = df_chat['DATE'] + pd.to_timedelta(df_chat['HOUR'] * 60 + df_chat.pop('MINUTE').astype(int), unit='m')
+
+    return df_chat
+
+def split_last_message(
+        buffer : str, 
+        search_from : int = 0) -> tuple:
+    """
+    Split a buffer of chat text before the start of its last message, which may still be missing 
+    continuation lines that have not been read yet.
+    
+    Parameters:
+    - buffer (str): Chat text read so far.
+    - search_from (int): Position before which no message start is searched (default is 0).
+    
+    Returns:
+    - tuple: The complete messages and the text from the last message start onwards.
+    """
+    position = len(buffer)
+    while True:
+        position = buffer.rfind('\n', search_from, position)
+        if position < 0:
+            return '', buffer
+        if message_start_regex.match(buffer, position + 1):
+            return buffer[:position], buffer[position + 1:]
+
+def iter_message_batches(
+        file, 
+        chunk_size : int = STREAM_CHUNK_SIZE):
+    """
+    Read a WhatsApp chat file chunk by chunk and yield its messages as DataFrames, one per chunk, so 
+    only the current chunk and the unfinished last message are held as text. The last message of a 
+    chunk is carried over to the next one with its continuation lines.
+    
+    Parameters:
+    - file (file-like object): The WhatsApp chat file to process, opened in binary mode.
+    - chunk_size (int): Number of bytes read at a time (default is STREAM_CHUNK_SIZE).
+    
+    Yields:
+    - pd.DataFrame: Parsed messages (see 'parse_messages'), in chat order.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    date_format = None
+    pending = ''
+    while True:
+        chunk = file.read(chunk_size)
+        final = not chunk
+        text = pending + decoder.decode(chunk, final=final)
+        text = text.replace('\r\n', '\n')
+        if final:
+            complete, pending = text, ''
+        else:
+            # The carried text starts with a message, so only the new lines can hold a later start
+            complete, pending = split_last_message(text, max(len(pending) - 1, 0))
+
+        if complete:
+            if date_format is None:
+                # The format is decided from the dates of the first chunk and kept for the whole file
+                dates = message_date_regex.findall(complete)
+                date_format = infer_date_format(dates) if dates else None
+            batch = parse_messages(complete, date_format)
+            if not batch.empty:
+                yield batch
+        if final:
+            break
 
 def preprocess_whatsapp_data(file) -> pd.DataFrame:
     """
@@ -87,42 +474,140 @@ def preprocess_whatsapp_data(file) -> pd.DataFrame:
     
     Returns:
     - pd.DataFrame: A DataFrame containing processed chat data with columns for date, time, 
-      sender (issuer), message, and message length.
-    """
-    chat_lines = file.read().decode('utf-8').splitlines()
-    message_pattern = r".*\/.*\/.*,.*:.* - .*"
-    processed_lines = []
-    pending_lines = []
-    
-    for i in range(len(chat_lines)):
-        if re.match(message_pattern, chat_lines[i]):
-            if pending_lines:
-                processed_lines[-1] = ' '.join(pending_lines)
-                pending_lines = []
-            processed_lines.append(chat_lines[i])
-        else:
-            if not pending_lines:
-                pending_lines.append(chat_lines[i-1])
-            pending_lines.append(chat_lines[i])
+      sender (issuer), message, and message length, indexed by the sorted message timestamps.
+    """
+    batches = list(iter_message_batches(file))
+    chat = pd.concat(batches, ignore_index=True) if batches else parse_messages('')
+
+    # A sorted time index turns date range queries into binary searches (see 'filter_chat')
+    chat = chat.set_index('TIMESTAMP')
+    if not chat.index.is_monotonic_increasing:
+        chat = chat.sort_index(kind='stable')
+    return chat
+
+# Gaps longer than this between messages of different issuers are not counted as responses
+RESPONSE_MAX_GAP = pd.Timedelta(hours=24)
+
+def filter_chat(
+        data : pd.DataFrame, 
+        start = None, 
+        end = None) -> pd.DataFrame:
+    """
+    Select the messages of a date range with two binary searches on the sorted time index.
     
-    df_chat = pd.DataFrame(processed_lines, columns=['RAW_DATA'])
-    df_chat['DATE'] = df_chat['RAW_DATA'].apply(lambda x: x.split(',')[0])
-    df_chat['HOUR'] = df_chat['RAW_DATA'].apply(lambda x: x.split(',')[1].split('-')[0].strip())
-    df_chat['ISSUER'] = df_chat['RAW_DATA'].apply(lambda x: x.split('- ')[1].split(':')[0])
-    df_chat['MESSAGE'] = df_chat['RAW_DATA'].apply(lambda x: x.split(': ')[1] if ': ' in x else None)
+    Parameters:
+    - data (pd.DataFrame): The processed chat (see 'preprocess_whatsapp_data').
+    - start (str or datetime): First day of the range (optional, from the first message if None).
+    - end (str or datetime): Last day of the range, included (optional, up to the last message if None).
     
-    df_chat = df_chat[df_chat['MESSAGE'].notna()]
-    df_chat['IS_MULTIMEDIA'] = df_chat['MESSAGE'].apply(lambda msg: 1 if 'Multimedia' in msg else 0)
-    df_chat = df_chat[df_chat['IS_MULTIMEDIA'] == 0].drop(['RAW_DATA', 'IS_MULTIMEDIA'], axis=1)
+    Returns:
+    - pd.DataFrame: The messages of the range, a slice of 'data'.
+    """
+    assert isinstance(data, pd.DataFrame), "The 'data' must be a Pandas DataFrame"
+
+    first = data.index.searchsorted(pd.Timestamp(start).normalize()) if start is not None else 0
+    last = data.index.searchsorted(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)) if end is not None else len(data)
+    return data.iloc[first:last]
+
+def messages_per_period(
+        data : pd.DataFrame, 
+        freq : str = 'D') -> pd.Series:
+    """
+    Count the messages of every period (days, weeks...) between the first and the last message, 
+    including the periods without messages.
     
-    df_chat['DATE'] = pd.to_datetime(df_chat['DATE'], dayfirst=True)
-    df_chat['dow'] = df_chat['DATE'].dt.dayofweek
-    df_chat['dom'] = df_chat['DATE'].dt.day
-    df_chat['month'] = df_chat['DATE'].dt.month
-    df_chat['HOUR'] = df_chat['HOUR'].apply(lambda hour: int(hour.split(':')[0]))
-    df_chat['len_message'] = df_chat['MESSAGE'].apply(lambda msg: len(msg.split()))
+    Parameters:
+    - data (pd.DataFrame): The processed chat (see 'preprocess_whatsapp_data').
+    - freq (str): Pandas frequency of the periods, e.g. 'D' for days or 'W' for weeks (default is 'D').
     
-    return df_chat
+    Returns:
+    - pd.Series: Number of messages by period start.
+    """
+    assert isinstance(data, pd.DataFrame), "The 'data' must be a Pandas DataFrame"
+
+    return data['MESSAGE'].resample(freq).count()
+
+def response_latency(
+        data : pd.DataFrame, 
+        max_gap : pd.Timedelta = RESPONSE_MAX_GAP) -> pd.DataFrame:
+    """
+    Measure how long every issuer takes to answer: a response is a message that follows a message of 
+    another issuer within 'max_gap', and its latency is the time between both.
+    
+    Parameters:
+    - data (pd.DataFrame): The processed chat (see 'preprocess_whatsapp_data').
+    - max_gap (pd.Timedelta): Longest gap counted as a response (default is RESPONSE_MAX_GAP).
+    
+    Returns:
+    - pd.DataFrame: A DataFrame with the number of responses and the median latency in minutes of every issuer.
+    """
+    assert isinstance(data, pd.DataFrame), "The 'data' must be a Pandas DataFrame"
+
+    issuers = data['ISSUER'].to_numpy()
+    times = data.index.to_numpy()
+    gaps = times[1:] - times[:-1]
+    responses = (issuers[1:] != issuers[:-1]) & (gaps <= max_gap.to_timedelta64())
+    latency = pd.DataFrame({
+        'ISSUER': issuers[1:][responses], 
+        'MINUTES': gaps[responses] / np.timedelta64(1, 'm')
+    })
+    return latency.groupby('ISSUER')['MINUTES'].agg(RESPONSES='count', MEDIAN_MINUTES='median').reset_index()
+
+# Calendar fields counted by the dashboard: column -> (first value, number of values)
+CUBE_FIELDS = {'HOUR': (0, 24), 'dow': (0, 7), 'dom': (1, 31), 'month': (1, 12)}
+
+def build_count_cube(data : pd.DataFrame) -> dict:
+    """
+    Count the messages of every issuer by hour, day of the week, day of the month and month, once per 
+    upload, so the dashboard only has to look the counts up when another issuer is selected.
+    
+    Parameters:
+    - data (pd.DataFrame): The processed chat (see 'preprocess_whatsapp_data').
+    
+    Returns:
+    - dict: Issuer (plus 'GENERAL' for the whole chat, if there are messages) -> column of CUBE_FIELDS -> 
+      NumPy array with the number of messages for each value of the column, starting at its first value.
+    """
+    assert isinstance(data, pd.DataFrame), "The 'data' must be a Pandas DataFrame"
+
+    codes, issuers = pd.factorize(data['ISSUER'], sort=True)
+    cube = {issuer: {} for issuer in issuers}
+    for column, (first, size) in CUBE_FIELDS.items():
+        values = data[column].to_numpy() - first
+        valid = (values >= 0) & (values < size)
+        counts = np.bincount(codes[valid] * size + values[valid], minlength=len(issuers) * size)
+        for issuer, issuer_counts in zip(issuers, counts.reshape(len(issuers), size)):
+            cube[issuer][column] = issuer_counts
+
+    if len(issuers):
+        cube['GENERAL'] = {column: sum(cube[issuer][column] for issuer in issuers) for column in CUBE_FIELDS}
+    return cube
+
+def analyze_chat(
+        path : str, 
+        language : str = 'english') -> dict:
+    """
+    Parse a WhatsApp chat saved to disk and precompute everything the dashboard draws from: sentiment 
+    scores, message counts and word frequencies. Meant to run as a background job, it reports its progress.
+    
+    Parameters:
+    - path (str): Path of the WhatsApp chat file.
+    - language (str): The language for the stopword list (default is 'english').
+    
+    Returns:
+    - dict: The session state of the chat (see 'create_chat_session').
+    """
+    with open(path, 'rb') as f:
+        chat = preprocess_whatsapp_data(ProgressReader(f, os.path.getsize(path), end=0.5, message='Parsing chat'))
+    report_progress(0.5, 'Scoring sentiment')
+    chat['score'] = score_messages(chat['MESSAGE'])
+    report_progress(0.8, 'Counting messages and words')
+    return {
+        'chat': chat, 
+        'cube': build_count_cube(chat), 
+        'words': build_word_frequencies(chat, language), 
+        'language': language
+    }
 
 def text_normalizer(
         data : pd.DataFrame, 
@@ -142,7 +627,7 @@ def text_normalizer(
     assert isinstance(language, str), "The 'language' must be a string"
 
     urlRegex = re.compile('http\S+')
-    stopword_list = nltk.corpus.stopwords.words(language)
+    stopword_list = get_stopwords(language)
     text = ' '.join([str(word) for word in ' '.join(data['MESSAGE']).lower().split() if word not in stopword_list])
     text = ' '.join([unidecode(str(word)) for word in text.split()])
     text = ' '.join([str(word) for word in text.split() if not re.match(urlRegex, word)])
@@ -1,9 +1,15 @@
 # Import necessary libraries
-import requests, folium, warnings, os, webbrowser
+import requests, folium, warnings, os, io, json, zlib, itertools
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
 from branca.colormap import linear
 import plotly.graph_objects as go
+from modules.cache import PersistentCache
 
 # Ignore warnings to keep the output clean
 warnings.filterwarnings("ignore")
@@ -99,14 +105,110 @@ strings_to_exclude = [
     'North America'
 ]
 
-# Function to fetch country-level data for a given indicator ID from the World Bank API
+# World Bank API settings: root URL, page size, concurrency, per-request timeout (seconds) and retry policy
+API_URL = 'https://api.worldbank.org/v2'
+API_PER_PAGE = 20000
+API_MAX_WORKERS = 8
+API_TIMEOUT = 30
+API_RETRIES = 3
+API_BACKOFF_FACTOR = 0.5
+
+# Cache of raw indicator payloads keyed by indicator ID, persisted so it survives restarts
+payload_cache = PersistentCache(
+    max_entries=len(indicators) * 2,
+    max_bytes=512 * 1024 * 1024,
+    ttl=24 * 60 * 60,
+    cache_dir=os.path.join('cache', 'world_bank'))
+
+# Function to fetch country-level data for a given indicator ID, using the payload cache when possible
 def get_country_data_for_indicator(
         indicator_id : str) -> list:
     """
+    Returns country-level data for a specified indicator, fetching it from the World Bank API only when 
+    it is not already in the payload cache (or the cached copy has expired).
+    
+    Parameters:
+    indicator_id (str): The ID of the indicator to fetch data for.
+    
+    Returns:
+    list or None: A list of filtered data entries, or None if the data could not be fetched.
+    """
+    assert isinstance(indicator_id, str), "The 'indicator_id' must be a string"
+
+    return payload_cache.get_or_set(indicator_id, lambda: fetch_country_data_for_indicator(indicator_id))
+
+# Function to load every indicator into the payload cache ahead of the first request
+def prewarm_cache(indicator_ids : list = None) -> None:
+    """
+    Loads the payload cache and the indexed stores for the given indicators so users never wait on the 
+    network for them. Missing payloads are downloaded concurrently with 'fetch_indicators'.
+    
+    Parameters:
+    indicator_ids (list, optional): Indicator IDs to load. Default is every code in 'indicators'.
+    """
+    if indicator_ids is None:
+        indicator_ids = list(indicators.values())
+    assert isinstance(indicator_ids, list), "The 'indicator_ids' must be a list"
+
+    missing_ids = [indicator_id for indicator_id in indicator_ids if indicator_id not in payload_cache]
+    for indicator_id, data in fetch_indicators(missing_ids).items():
+        if data:
+            payload_cache.set(indicator_id, data)
+
+    for indicator_id in indicator_ids:
+        try:
+            get_indicator_store(indicator_id)
+        except Exception as e:
+            print(f'\nError {indicator_id}: {e}')
+
+# Function to create an HTTP session with a bounded connection pool and automatic retries
+def create_session(
+        pool_size : int = API_MAX_WORKERS, 
+        retries : int = API_RETRIES, 
+        backoff_factor : float = API_BACKOFF_FACTOR) -> requests.Session:
+    """
+    Creates a requests Session whose connection pool holds up to 'pool_size' connections per host and 
+    whose requests are retried with exponential backoff on connection errors and on 429/5xx responses.
+    
+    Parameters:
+    pool_size (int, optional): Maximum number of pooled connections per host. Default is API_MAX_WORKERS.
+    retries (int, optional): Maximum number of retries per request. Default is API_RETRIES.
+    backoff_factor (float, optional): Base of the exponential backoff between retries, in seconds. Default is API_BACKOFF_FACTOR.
+    
+    Returns:
+    requests.Session: The configured session.
+    """
+    assert isinstance(pool_size, int) and pool_size > 0, "The 'pool_size' must be a positive integer"
+    assert isinstance(retries, int), "The 'retries' must be an integer"
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=['GET'])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+# Shared session reused by every request to the World Bank API
+session = create_session()
+
+# Function to fetch country-level data for a given indicator ID from the World Bank API
+def fetch_country_data_for_indicator(
+        indicator_id : str, 
+        http_session : requests.Session = None, 
+        base_url : str = API_URL, 
+        timeout : float = API_TIMEOUT) -> list:
+    """
     Fetches country-level data for a specified indicator from the World Bank API.
     
     Parameters:
     indicator_id (str): The ID of the indicator to fetch data for.
+    http_session (requests.Session, optional): Session used for the requests. Default is the shared 'session'.
+    base_url (str, optional): Root URL of the API, e.g. a local stub server. Default is API_URL.
+    timeout (float, optional): Connect and read timeout per request, in seconds. Default is API_TIMEOUT.
     
     Returns:
     list or None: A list of filtered data entries if the request is successful and data is in the expected format, 
@@ -114,53 +216,302 @@ def get_country_data_for_indicator(
     
     This function constructs the API request URL using the provided indicator ID, specifies the desired parameters 
     (data format as JSON, date range from 1960 to 2023, and a large page size to include all data), and sends 
-    the request to the World Bank API. If the response is successful (HTTP status code 200) and the data is in 
-    the expected format, it filters out entries for excluded countries and entries with None values for the indicator. 
-    If the response status code is not 200 or the data structure is not as expected, it prints an error message and 
-    returns None.
+    the request to the World Bank API, following the remaining pages when the data does not fit in one. If every 
+    response is successful (HTTP status code 200) and the data is in the expected format, it filters out entries 
+    for excluded countries and entries with None values for the indicator. If a response status code is not 200, 
+    the request fails or the data structure is not as expected, it prints an error message and returns None.
     """
     assert isinstance(indicator_id, str), "The 'indicator_id' must be a string"
 
-    url = f'https://api.worldbank.org/v2/country/all/indicator/{indicator_id}'
+    http_session = http_session or session
+    url = f'{base_url}/country/all/indicator/{indicator_id}'
     params = {
         'format': 'json',
         'date': '1960:2023',
-        'per_page': 20000
+        'per_page': API_PER_PAGE
     }
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
+
+    entries = []
+    page, pages = 1, 1
+    while page <= pages:
+        try:
+            response = http_session.get(url, params={**params, 'page': page}, timeout=timeout)
+        except requests.RequestException as e:
+            print(f'\nError {indicator_id}: {e}')
+            return None
+        if response.status_code != 200:
+            print(f'\nError {indicator_id}: {response.status_code}')
+            return None
+
         data = response.json()
-        # Check if the response is in the expected format and filter out excluded countries and None values
-        if isinstance(data, list) and len(data) > 1 and 'country' in data[1][0]:
-            filtered_data = [
-                entry for entry in data[1]
-                if entry['country']['value'] not in strings_to_exclude and entry['value'] is not None
-            ]
-            return filtered_data
-        else:
+        # Check if the response is in the expected format
+        if not (isinstance(data, list) and len(data) > 1 and data[1] and 'country' in data[1][0]):
             print(f'\nError {indicator_id}: Unexpected data structure')
             return None
-    else:
-        print(f'\nError {indicator_id}: {response.status_code}')
-        return None
+        entries.extend(data[1])
+        pages = int(data[0].get('pages', 1))
+        page += 1
+
+    # Filter out excluded countries and None values
+    filtered_data = [
+        entry for entry in entries
+        if entry['country']['value'] not in strings_to_exclude and entry['value'] is not None
+    ]
+    return filtered_data
+
+# Function to fetch many indicators concurrently through the shared connection pool
+def fetch_indicators(
+        indicator_ids : list, 
+        max_workers : int = API_MAX_WORKERS, 
+        http_session : requests.Session = None, 
+        base_url : str = API_URL, 
+        timeout : float = API_TIMEOUT) -> dict:
+    """
+    Fetches several indicators at once using a thread pool limited to 'max_workers' concurrent requests.
+    
+    Parameters:
+    indicator_ids (list): Indicator IDs to fetch.
+    max_workers (int, optional): Maximum number of concurrent requests. Default is API_MAX_WORKERS.
+    http_session (requests.Session, optional): Session shared by the workers. Default is the shared 'session'.
+    base_url (str, optional): Root URL of the API, e.g. a local stub server. Default is API_URL.
+    timeout (float, optional): Connect and read timeout per request, in seconds. Default is API_TIMEOUT.
+    
+    Returns:
+    dict: Mapping of indicator ID to its filtered data entries, or None for the indicators that failed.
+    """
+    assert isinstance(indicator_ids, list), "The 'indicator_ids' must be a list"
+    assert isinstance(max_workers, int) and max_workers > 0, "The 'max_workers' must be a positive integer"
+
+    if not indicator_ids:
+        return {}
+
+    http_session = http_session or session
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(indicator_ids))) as executor:
+        futures = {
+            indicator_id: executor.submit(
+                fetch_country_data_for_indicator, indicator_id, http_session, base_url, timeout)
+            for indicator_id in indicator_ids
+        }
+        return {indicator_id: future.result() for indicator_id, future in futures.items()}
+
+# Columnar, pre-indexed view of an indicator payload used to answer country/year lookups
+class IndicatorStore:
+    """
+    Columnar in-memory store for the data of one World Bank indicator.
+
+    The payload is converted once into a DataFrame with categorical 'ISO_CODE' and 'COUNTRY' columns, 
+    a string 'DATE' column and a float 'VALUE' column, sorted by 'COUNTRY' ascending and 'DATE' descending 
+    and without duplicates. A country index (country -> contiguous row slice) and a year index 
+    (year -> row positions) are built on top of it, so every lookup only touches the k matching rows 
+    and its result is already sorted.
+    """
+
+    columns = ['ISO_CODE', 'COUNTRY', 'DATE', 'VALUE']
+
+    def __init__(self, data : list) -> None:
+        """
+        Parameters:
+        data (list): Entries returned by the World Bank API for a single indicator.
+        """
+        assert isinstance(data, list), "The 'data' must be a list"
+
+        frame = pd.DataFrame({
+            'ISO_CODE': [entry['countryiso3code'] for entry in data],
+            'COUNTRY': [entry['country']['value'] for entry in data],
+            'DATE': [entry['date'] for entry in data],
+            'VALUE': np.array([entry['value'] for entry in data], dtype=float),
+        }, columns=self.columns)
+        frame = frame.sort_values(by=['COUNTRY', 'DATE'], ascending=[True, False], kind='stable')
+        frame = frame.drop_duplicates().reset_index(drop=True)
+        frame['ISO_CODE'] = frame['ISO_CODE'].astype('category')
+        frame['COUNTRY'] = frame['COUNTRY'].astype('category')
+        self.frame = frame
+
+        # Rows are sorted by country, so each country owns one contiguous block of rows
+        countries = frame['COUNTRY'].to_numpy()
+        boundaries = np.flatnonzero(countries[1:] != countries[:-1]) + 1
+        starts = np.concatenate([[0], boundaries]) if len(frame) else np.array([], dtype=int)
+        stops = np.concatenate([boundaries, [len(frame)]]) if len(frame) else np.array([], dtype=int)
+        self.country_index = {countries[start]: slice(start, stop) for start, stop in zip(starts, stops)}
+
+        # Positions per year keep the global order, so they come out sorted by country
+        self.year_index = {year: positions for year, positions in frame.groupby('DATE', sort=False).indices.items()}
 
-# Function to plot time series data using Plotly, saving as an interactive HTML file
+        self.countries = list(self.country_index)
+        self.years = sorted(self.year_index, reverse=True)
+
+    def options(self, type : str) -> list:
+        """
+        Returns the sorted country names (ascending) or years (descending) available for the indicator.
+        """
+        if type == 'country':
+            return self.countries
+        elif type == 'year':
+            return self.years
+        return []
+
+    def query(self, type : str, option : str) -> pd.DataFrame:
+        """
+        Returns the rows of a country or a year, sorted by 'COUNTRY' ascending and 'DATE' descending.
+        """
+        if type == 'country':
+            rows = self.frame.iloc[self.country_index.get(option, slice(0, 0))]
+        elif type == 'year':
+            rows = self.frame.take(self.year_index.get(option, []))
+        else:
+            rows = self.frame.iloc[0:0]
+        return rows.reset_index(drop=True)
+
+# Cache of indexed stores, rebuilt from the payload cache whenever they expire
+store_cache = PersistentCache(max_entries=len(indicators), ttl=payload_cache.ttl)
+
+# Function to get the indexed store of an indicator
+def get_indicator_store(indicator_id : str) -> IndicatorStore:
+    """
+    Returns the columnar store of an indicator, building it from the cached payload the first time.
+    
+    Parameters:
+    indicator_id (str): The ID of the indicator.
+    
+    Returns:
+    IndicatorStore or None: The indexed data of the indicator, or None if it could not be fetched.
+    """
+    assert isinstance(indicator_id, str), "The 'indicator_id' must be a string"
+
+    def build_store():
+        data = get_country_data_for_indicator(indicator_id)
+        return IndicatorStore(data) if data else None
+
+    return store_cache.get_or_set(indicator_id, build_store)
+
+# Supported export formats: format name -> (mimetype, file extension)
+export_formats = {
+    'csv': ('text/csv', 'csv'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Function to write indicator values as the API returned them
+def serialize_values(values : pd.Series) -> pd.Series:
+    """
+    Converts the float 'VALUE' column for text output (JSON or CSV): integral values become int, so 
+    a population is written as 45000000 rather than 45000000.0, and missing values become None.
+    
+    Parameters:
+    values (pandas.Series): Float values of an 'IndicatorStore' query.
+    
+    Returns:
+    pandas.Series: The same values with object dtype.
+    """
+    numbers = values.to_numpy(dtype=float)
+    integral = (np.abs(numbers) < 2**53) & (numbers == np.round(numbers))  # Exactly representable integers
+    serialized = values.astype(object).where(values.notna(), None)
+    serialized[integral] = numbers[integral].astype(np.int64)
+    return serialized
+
+# Function to iterate over the rows of an export one indicator/option block at a time
+def iter_export_frames(
+        indicator_ids : list, 
+        type : str, 
+        options : list) -> iter:
+    """
+    Yields the rows of an export as small DataFrames, one per (indicator, option) pair, so a bulk export never 
+    holds more than one block in memory.
+    
+    Parameters:
+    indicator_ids (list): Indicator IDs to export.
+    type (str): 'country' or 'year'.
+    options (list): Countries or years to export for every indicator.
+    
+    Yields:
+    pandas.DataFrame: Blocks with columns 'COUNTRY', 'DATE' and 'VALUE', preceded by 'INDICATOR' when 
+    more than one indicator is exported.
+    """
+    assert isinstance(indicator_ids, list), "The 'indicator_ids' must be a list"
+    assert isinstance(options, list), "The 'options' must be a list"
+
+    for indicator_id in indicator_ids:
+        store = get_indicator_store(indicator_id)
+        if not store:
+            continue
+        for option in options:
+            frame = store.query(type, option)[['COUNTRY', 'DATE', 'VALUE']].astype({'COUNTRY': str})
+            if len(indicator_ids) > 1:
+                frame.insert(0, 'INDICATOR', indicator_id)
+            yield frame
+
+# Function to encode export blocks as a stream of CSV, gzip-compressed CSV or Parquet chunks
+def stream_export(
+        frames : iter, 
+        format : str = 'csv') -> iter:
+    """
+    Encodes DataFrame blocks incrementally in the requested format, yielding the bytes of each block as soon as 
+    it is encoded, so exports can be sent as a streamed response without temporary files.
+    
+    Parameters:
+    frames (iterable): DataFrame blocks sharing the same columns, e.g. from 'iter_export_frames'.
+    format (str, optional): One of the keys of 'export_formats'. Default is 'csv'.
+    
+    Yields:
+    bytes: Consecutive chunks of the encoded file.
+    """
+    assert format in export_formats, f"The 'format' must be one of {list(export_formats)}"
+
+    if format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        frames = iter(frames)
+        first = next(frames, None)
+        # The schema is declared up front: an empty first block would otherwise type every column as null
+        columns = list(first.columns) if first is not None else ['COUNTRY', 'DATE', 'VALUE']
+        schema = pa.schema([(column, pa.float64() if column == 'VALUE' else pa.string()) for column in columns])
+
+        sink = io.BytesIO()
+        writer = pq.ParquetWriter(sink, schema)
+        for frame in itertools.chain([first] if first is not None else [], frames):
+            if frame.empty:
+                continue
+            frame = frame.astype({column: str for column in columns if column != 'VALUE'})
+            writer.write_table(pa.Table.from_pandas(frame[columns], schema=schema, preserve_index=False))
+            # Hand over the row group just written and reset the buffer
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+        # Closing always writes the footer, so an export without rows is still a valid file
+        writer.close()
+        yield sink.getvalue()
+        return
+
+    compressor = zlib.compressobj(wbits=31) if format == 'csv.gz' else None  # wbits=31 writes a gzip container
+    header = True
+    for frame in frames:
+        frame = frame.assign(VALUE=serialize_values(frame['VALUE']))
+        chunk = frame.to_csv(index=False, header=header).encode('utf-8')
+        header = False
+        yield compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.flush()
+
+# Function to plot time series data using Plotly
 def plot_time_series(
         df : pd.DataFrame, 
         title : str = '', 
-        template : str = 'plotly') -> None:
+        template : str = 'plotly') -> go.Figure:
     """
-    Plots time series data using Plotly and saves the plot as an interactive HTML file.
+    Plots time series data using Plotly.
     
     Parameters:
     df (pandas.DataFrame): The DataFrame containing the time series data with columns 'DATE' and 'VALUE'.
     title (str, optional): The title of the plot. Default is an empty string.
     template (str, optional): The Plotly template to use for the plot. Default is 'plotly'.
     
+    Returns:
+    plotly.graph_objects.Figure: The time series figure.
+    
     This function converts the 'DATE' column in the DataFrame to datetime format and extracts the year. 
     It then creates a Plotly figure with a time series plot (lines and markers) using the 'DATE' and 'VALUE' 
-    columns from the DataFrame. The plot is customized with a title and axis labels. The resulting plot is saved 
-    as an HTML file in the 'downloads' folder and opened in the default web browser.
+    columns from the DataFrame. The plot is customized with a title and axis labels.
     """
     assert isinstance(df, pd.DataFrame), "The 'df' must be a Pandas DataFrame"
     assert isinstance(title, str), "The 'title' must be a string"
@@ -180,28 +531,48 @@ def plot_time_series(
         yaxis_title='Value',
         template=template
     )
+    return fig
+
+# Simplification tolerance and coordinate grid (degrees) applied to the world geometry once it is loaded
+GEOMETRY_TOLERANCE = 0.05
+GEOMETRY_GRID_SIZE = 0.001
+
+# Cache of the pre-simplified world geometry, persisted so the shapefile is only parsed once
+geometry_cache = PersistentCache(max_entries=1, cache_dir=os.path.join('cache', 'geometry'))
+
+# Function to load the world geometry in a compact form indexed by ISO3 code
+def get_world_geometry() -> gpd.GeoDataFrame:
+    """
+    Returns the 'naturalearth_lowres' country polygons, simplified and snapped to a coarse coordinate grid 
+    to shrink the generated maps, with the English country name and indexed by ISO3 code. The result is 
+    built once and then served from 'geometry_cache'.
     
-    # Save the interactive Plotly figure as an HTML file and open it in the default web browser
-    downloads_folder = 'static/world_bank/'
-    if not os.path.exists(downloads_folder):
-        os.makedirs(downloads_folder)
-    temp_html_path = os.path.join(downloads_folder, 'time_series.html')
-    fig.write_html(temp_html_path)
-    webbrowser.open('file://' + os.path.realpath(temp_html_path))
+    Returns:
+    geopandas.GeoDataFrame: Country polygons with a 'name' column, indexed by 'iso_a3'.
+    """
+    def build_geometry():
+        world = gpd.read_file(gpd.datasets.get_path('naturalearth_lowres'))[['iso_a3', 'name', 'geometry']]
+        geometry = world.geometry.simplify(GEOMETRY_TOLERANCE, preserve_topology=True)
+        world['geometry'] = shapely.set_precision(geometry.values, grid_size=GEOMETRY_GRID_SIZE)
+        world = world[~world.geometry.is_empty]
+        return world.drop_duplicates('iso_a3').set_index('iso_a3')
 
-# Function to plot a heatmap using Folium and GeoPandas, saving as an interactive HTML file
-def plot_heatmap(df : pd.DataFrame) -> None:
+    return geometry_cache.get_or_set('naturalearth_lowres', build_geometry)
+
+# Function to build a choropleth map using Folium and GeoPandas
+def build_heatmap(df : pd.DataFrame) -> folium.Map:
     """
-    Plots a heatmap using Folium and GeoPandas, and saves the map as an interactive HTML file.
+    Builds a choropleth map of the latest value per country using Folium and GeoPandas.
     
     Parameters:
     df (pandas.DataFrame): The DataFrame containing the data with columns 'COUNTRY', 'DATE', 'ISO_CODE', and 'VALUE'.
     
-    This function filters the DataFrame to include only the latest data for each country. It loads the world shapefile 
-    from GeoPandas and ensures the country names are in English. The shapefile is merged with the DataFrame's data 
-    on country ISO codes. A base Folium map is created and country polygons are added with colors based on data values. 
-    A colormap is created and added to the map, which is then saved as an HTML file in the 'downloads' folder and 
-    opened in the default web browser.
+    Returns:
+    folium.Map: The map with the country layer and its colormap.
+    
+    This function filters the DataFrame to include only the latest data for each country and joins it to the cached 
+    world geometry on country ISO codes. A base Folium map is created and every country with data is drawn in a 
+    single GeoJson layer, colored and labelled from the feature properties, next to a colormap legend.
     """
     assert isinstance(df, pd.DataFrame), "The 'df' must be a Pandas DataFrame"
 
@@ -209,14 +580,8 @@ def plot_heatmap(df : pd.DataFrame) -> None:
     df = df.loc[df.groupby('COUNTRY')['DATE'].idxmax()]
     df['DATE'] = pd.to_datetime(df['DATE'])
     
-    # Load the world shapefile from GeoPandas
-    world = gpd.read_file(gpd.datasets.get_path('naturalearth_lowres'))
-    
-    # Ensure country names are in English
-    world = world[['iso_a3', 'geometry', 'name']]
-    
-    # Merge the world shapefile with the DataFrame's data
-    world = world.merge(df, how='left', left_on='iso_a3', right_on='ISO_CODE')
+    # Join the cached world geometry with the DataFrame's data, keeping the countries with data
+    world = get_world_geometry().join(df.set_index('ISO_CODE')[['DATE', 'VALUE']], how='inner')
     
     # Create a base Folium map
     m = folium.Map(location=[20, 0], zoom_start=2)
@@ -225,28 +590,63 @@ def plot_heatmap(df : pd.DataFrame) -> None:
     colormap = linear.YlOrRd_09.scale(df['VALUE'].min(), df['VALUE'].max())
     colormap.caption = 'Value by Country'
     
-    # Add country polygons to the map with color based on data values
-    for _, row in world.iterrows():
-        if pd.notna(row['VALUE']):
-            formatted_value = '{:,}'.format(round(row['VALUE'], 2))
-            geo_json = folium.GeoJson(
-                row['geometry'],
-                style_function=lambda x, value=row['VALUE']: {
-                    'fillColor': colormap(value),
-                    'color': 'black',
-                    'weight': 0.5,
-                    'fillOpacity': value / df['VALUE'].max()
-                }
-            )
-            geo_json.add_child(folium.Tooltip(f"{row['name']} ({row['DATE'].year}): {formatted_value}"))
-            geo_json.add_to(m)
+    # Precompute the style and tooltip of every country as feature properties
+    max_value = df['VALUE'].max()
+    features = gpd.GeoDataFrame({
+        'fill_color': [colormap(value) for value in world['VALUE']],
+        'fill_opacity': (world['VALUE'] / max_value).round(3),
+        'label': world['name'] + ' (' + world['DATE'].dt.year.astype(str) + '): ' + world['VALUE'].round(2).map('{:,}'.format),
+    }, geometry=world.geometry.values, crs=world.crs)
+    
+    # Add all country polygons to the map as one layer
+    folium.GeoJson(
+        features,
+        style_function=lambda feature: {
+            'fillColor': feature['properties']['fill_color'],
+            'color': 'black',
+            'weight': 0.5,
+            'fillOpacity': feature['properties']['fill_opacity']
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['label'], labels=False)
+    ).add_to(m)
     
     colormap.add_to(m)
+    return m
+
+# Cache of serialized figures keyed by (indicator ID, type, option)
+figure_cache = PersistentCache(max_entries=256, max_bytes=256 * 1024 * 1024, ttl=payload_cache.ttl)
+
+# Function to get the figure of an indicator for a country or a year as a JSON document
+def get_figure(
+        indicator_id : str, 
+        type : str, 
+        option : str) -> str:
+    """
+    Returns the interactive graph of an indicator as a JSON document rendered by the browser, serving repeated 
+    requests from 'figure_cache'. A country produces a Plotly time series ({"kind": "plotly", "figure": ...}) 
+    and a year produces the Folium choropleth as a standalone page ({"kind": "html", "html": ...}).
+    
+    Parameters:
+    indicator_id (str): The ID of the indicator.
+    type (str): 'country' or 'year'.
+    option (str): The selected country or year.
     
-    # Save the interactive Folium map as an HTML file and open it in the default web browser
-    downloads_folder = 'static/world_bank/'
-    if not os.path.exists(downloads_folder):
-        os.makedirs(downloads_folder)
-    temp_html_path = os.path.join(downloads_folder, 'heatmap.html')
-    m.save(temp_html_path)
-    webbrowser.open('file://' + os.path.realpath(temp_html_path))
+    Returns:
+    str or None: The JSON document, or None if the indicator has no data for the selection.
+    """
+    assert isinstance(indicator_id, str), "The 'indicator_id' must be a string"
+    assert type in ('country', 'year'), "The 'type' must be 'country' or 'year'"
+
+    def build_figure():
+        store = get_indicator_store(indicator_id)
+        if not store:
+            return None
+        df = store.query(type, option).astype({'ISO_CODE': str, 'COUNTRY': str})
+        if df.empty:
+            return None
+        if type == 'country':
+            figure = plot_time_series(df, title=option)
+            return '{"kind": "plotly", "figure": ' + figure.to_json() + '}'
+        return json.dumps({'kind': 'html', 'html': build_heatmap(df).get_root().render()})
+
+    return figure_cache.get_or_set((indicator_id, type, option), build_figure)
@@ -0,0 +1,38 @@
+// Milliseconds between two status requests
+const POLL_INTERVAL = 1000;
+
+// Function to request the status of the job and update the progress bar
+function pollJob(container) {
+    fetch(container.dataset.statusUrl)
+        .then(response => response.json().then(job => ({ ok: response.ok, job: job })))
+        .then(({ ok, job }) => {
+            if (!ok) {
+                // The job does not exist or its result has expired
+                document.getElementById('job-message').innerText = job.error;
+                return;
+            }
+            const percentage = Math.round(job.progress * 100);
+            document.getElementById('job-progress').value = percentage;
+            document.getElementById('job-percentage').innerText = `${percentage}%`;
+            document.getElementById('job-message').innerText = job.message;
+
+            if (job.status === 'finished' || job.status === 'failed') {
+                // The result page shows the results, or the error of the job
+                window.location.href = job.result_url;
+            } else {
+                setTimeout(() => pollJob(container), POLL_INTERVAL);
+            }
+        })
+        .catch(error => {
+            console.error('Error fetching job status:', error);
+            setTimeout(() => pollJob(container), POLL_INTERVAL);
+        });
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+    // When the DOM content is fully loaded, start polling the job
+    const container = document.getElementById('job-status');
+    if (container) {
+        pollJob(container);
+    }
+});
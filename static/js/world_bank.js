@@ -210,12 +210,32 @@ document.querySelector('.interactive-graph').addEventListener('click', function
             if (!response.ok) {
                 throw new Error('Network response was not ok');
             }
-            console.log('Interactive graph generated.');
+            return response.json(); // Parse the JSON figure
         })
+        .then(renderGraph)
         .catch(error => {
             console.error('There was a problem with the interactive graph request:', error);
         });
     } else {
         alert("Please make sure all selections are made.");
     }
-});
\ No newline at end of file
+});
+
+// Function to render a figure returned by /interactive_graph in the graph container
+function renderGraph(payload) {
+    const graphContainer = document.querySelector('.world-bank-graph-container');
+    const graph = document.getElementById('worldBankGraph');
+    graph.innerHTML = ''; // Clear the previous graph
+    if (payload.kind === 'plotly') {
+        // Time series: draw the Plotly figure spec on the client
+        Plotly.newPlot(graph, payload.figure.data, payload.figure.layout, { responsive: true });
+    } else if (payload.kind === 'html') {
+        // Choropleth: show the standalone map page in a frame
+        const frame = document.createElement('iframe');
+        frame.srcdoc = payload.html;
+        frame.className = 'world-bank-graph-frame';
+        graph.appendChild(frame);
+    }
+    graphContainer.style.display = 'block'; // Show the graph container
+    graphContainer.scrollIntoView({ behavior: 'smooth' });
+}
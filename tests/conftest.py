@@ -0,0 +1,3 @@
+# Make the 'modules' package importable when the tests are run from any folder
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,43 @@
+import time, threading
+
+import numpy as np
+import pandas as pd
+
+from modules.cache import PersistentCache, estimate_size
+
+def test_get_or_set_computes_a_missing_key_once():
+    cache = PersistentCache()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('key', factory))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+    assert cache._key_locks == {}
+
+def test_memory_limit_uses_estimated_sizes():
+    cache = PersistentCache(max_bytes=3 * 8 * 1000 + 1000)
+    for key in range(5):
+        cache.set(key, np.zeros(1000))
+    assert len(cache) == 3 and 0 not in cache
+
+def test_disk_entries_are_sized_from_the_written_file(tmp_path):
+    cache = PersistentCache(cache_dir=str(tmp_path))
+    cache.set('frame', pd.DataFrame({'a': range(100)}))
+    (file,) = tmp_path.glob('*.pkl')
+    assert cache._total_bytes == file.stat().st_size
+    assert PersistentCache(cache_dir=str(tmp_path)).get('frame')['a'].sum() == 4950
+
+def test_estimate_size():
+    assert estimate_size(np.zeros(1000)) == 8000
+    assert estimate_size({'a': np.zeros(10)}) > 80
+    assert estimate_size(pd.DataFrame({'a': np.zeros(100)})) >= 800
@@ -0,0 +1,33 @@
+import os, time
+
+from modules import jobs
+from modules.jobs import JobQueue
+from modules.keyphrase_extraction import default_workers, PARALLEL_MIN_CHARS
+
+def wait_for(queue, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job is not None and job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+def test_jobs_are_visible_to_every_queue_sharing_the_store(tmp_path):
+    owner = JobQueue(max_workers=1, store_dir=str(tmp_path))
+    other = JobQueue(max_workers=1, store_dir=str(tmp_path))
+
+    job_id = owner.submit('sum', sum, [1, 2, 3])
+    job = wait_for(other, job_id)
+    assert job['status'] == 'finished' and job['result'] == 6
+
+    failed_id = owner.submit('sum', sum, [1, 'a'])
+    job = wait_for(other, failed_id)
+    assert job['status'] == 'failed' and isinstance(job['error'], TypeError)
+    assert other.get('missing') is None
+
+def test_inner_pools_are_serial_inside_a_job(monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    assert default_workers(PARALLEL_MIN_CHARS) == 4
+    monkeypatch.setattr(jobs, '_current_job', 'job')
+    assert default_workers(PARALLEL_MIN_CHARS) == 1
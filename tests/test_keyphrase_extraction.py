@@ -0,0 +1,55 @@
+import io, time, random
+from collections import Counter
+
+from modules.keyphrase_extraction import (NgramCounter, count_ngrams, iter_sentences, PARALLEL_MIN_CHARS,
+                                         MAX_SENTENCE_CHARS, STREAM_CHUNK_SIZE)
+
+def test_pruned_counts_stay_within_the_error_bound():
+    random.seed(0)
+    tokens = [f'rare{random.randrange(5000)}' for _ in range(20000)]
+    tokens += [f'common{i}' for i in range(10) for _ in range(300 * (i + 1))]
+    random.shuffle(tokens)
+
+    max_ngrams = 50
+    counter = NgramCounter(max_n=1, max_ngrams=max_ngrams)
+    for start in range(0, len(tokens), 1000):
+        counter.update(tokens[start:start + 1000])
+
+    exact = Counter((token,) for token in tokens)
+    bound = len(tokens) / (max_ngrams + 1)
+    assert len(counter.counts[1]) <= 2 * max_ngrams
+    for ngram, freq in counter.counts[1].items():
+        assert exact[ngram] - bound <= freq <= exact[ngram]
+    for ngram, freq in exact.items():
+        if freq > bound:
+            assert ngram in counter.counts[1]
+
+def test_pruning_does_not_depend_on_the_order_of_ties():
+    tokens = ['a', 'a', 'b', 'c', 'd', 'e', 'f']
+    kept = set()
+    for order in (tokens, tokens[::-1]):
+        counter = NgramCounter(max_n=1, max_ngrams=2)
+        counter.update(order)
+        kept.add(frozenset(counter.counts[1].items()))
+    assert kept == {frozenset({(('a',), 1)})}
+
+def test_serial_and_parallel_modes_count_the_same_ngrams():
+    random.seed(1)
+    vocabulary = [f'word{i}' for i in range(3000)]
+    sentences = [' '.join(random.choices(vocabulary, k=random.randint(5, 25))) + '.' for _ in range(12000)]
+    assert sum(map(len, sentences)) >= PARALLEL_MIN_CHARS
+
+    # A small limit makes every order prune, where the two modes used to diverge
+    serial = count_ngrams(sentences, 3, workers=1, max_ngrams=2000)
+    parallel = count_ngrams(sentences, 3, workers=2, max_ngrams=2000)
+    for n in range(1, 4):
+        assert serial.counts[n] == parallel.counts[n]
+        assert serial.top(n, 10) == parallel.top(n, 10)
+
+def test_text_without_punctuation_is_split_into_bounded_sentences():
+    text = '\n'.join(' '.join(f'word{i}' for i in range(line, line + 2000)) for line in range(0, 400000, 2000))
+    start = time.perf_counter()
+    sentences = list(iter_sentences(io.BytesIO(text.encode('utf-8')), max_bytes=None))
+    assert time.perf_counter() - start < 30
+    assert max(map(len, sentences)) <= MAX_SENTENCE_CHARS + STREAM_CHUNK_SIZE
+    assert ' '.join(sentences).split() == text.split()
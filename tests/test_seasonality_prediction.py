@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.seasonality_prediction import (forecasting, batch_forecasting, batch_holdout_forecasting, 
+                                            IncrementalForecaster)
+
+def reference_forecasting(serie : pd.Series, periodicity : int) -> list:
+    """The original 'forecasting': moving averages with pandas and the trend with the normal equations."""
+    ones = [1] * len(serie)
+    pastPeriods = np.arange(1, len(serie) + 1)
+    nextPeriod = np.arange(pastPeriods[-1] + 1, pastPeriods[-1] + 1 + periodicity)
+    periods = np.arange(1, periodicity + 1, 1).tolist() * int(pastPeriods[-1] / periodicity)
+    periods = periods[int(periodicity / 2) : -int(periodicity / 2)]
+
+    serie_cma = serie.rolling(periodicity).mean().dropna().rolling(2).mean().dropna()
+    irr_seas_comp = serie[int(periodicity / 2) : -int(periodicity / 2)].values.ravel() / serie_cma.values.ravel()
+    seas_index = pd.concat([pd.Series(irr_seas_comp), pd.Series(periods)], axis = 1, keys = ['IRREGULAR_SEASONAL_COMPONENTS', 'PERIOD']).groupby('PERIOD')['IRREGULAR_SEASONAL_COMPONENTS'].mean()
+    adj_seas_index = seas_index / np.mean(seas_index.values)
+    adj_seas_index = adj_seas_index.tolist() * int(pastPeriods[-1] / periodicity)
+    unseas_serie = serie.values.ravel() / adj_seas_index
+    X, y = np.array([ones, pastPeriods]).T, unseas_serie
+
+    b = np.linalg.inv(X.T.dot(X)).dot(X.T).dot(y)
+    forecast = (b[0] + b[1] * nextPeriod) * adj_seas_index[ : periodicity]
+    return [round(float(elem),2) for elem in forecast]
+
+def seasonal_series(periodicity : int, cycles : int, columns : int = 1, seed : int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    periods = np.arange(periodicity * cycles)[:, None]
+    season = 1 + 0.3 * np.sin(2 * np.pi * periods / periodicity + rng.uniform(0, np.pi, columns))
+    trend = rng.uniform(50, 150, columns) + rng.uniform(0.1, 2, columns) * periods
+    noise = rng.normal(1, 0.05, (len(periods), columns))
+    return pd.DataFrame(trend * season * noise, columns=[f'S{i}' for i in range(columns)])
+
+@pytest.mark.parametrize('periodicity', [4, 12, 52])
+def test_forecasting_matches_the_original(periodicity):
+    serie = seasonal_series(periodicity, 5)['S0']
+    np.testing.assert_allclose(forecasting(serie, periodicity), reference_forecasting(serie, periodicity), atol=0.011)
+
+@pytest.mark.parametrize('periodicity', [4, 12, 52])
+def test_batch_forecasts_match_every_column(periodicity):
+    series = seasonal_series(periodicity, 4, columns=6, seed=periodicity)
+    next_cycle = batch_forecasting(series, periodicity)
+    last_cycle, next_holdout = batch_holdout_forecasting(series, periodicity, max_workers=4)
+    for column in series.columns:
+        expected = reference_forecasting(series[column], periodicity)
+        np.testing.assert_allclose(next_cycle[column], expected, atol=0.011)
+        np.testing.assert_allclose(next_holdout[column], expected, atol=0.011)
+        np.testing.assert_allclose(last_cycle[column], 
+                                   reference_forecasting(series[column][:-periodicity], periodicity), atol=0.011)
+
+@pytest.mark.parametrize('periodicity', [4, 12])
+def test_incremental_forecaster_survives_a_round_trip(periodicity):
+    serie = seasonal_series(periodicity, 6)['S0']
+    split = 3 * periodicity + 1  # Not a cycle boundary, so the saved window is partly filled
+    forecaster = IncrementalForecaster(periodicity).update(serie[:split])
+    restored = IncrementalForecaster.from_dict(json.loads(json.dumps(forecaster.to_dict())))
+    restored.update(serie[split:4 * periodicity])
+    assert restored.forecast() == pytest.approx(reference_forecasting(serie[:4 * periodicity], periodicity), abs=0.011)
+    for value in serie[4 * periodicity:]:
+        restored.update(value)
+    assert restored.forecast() == pytest.approx(reference_forecasting(serie, periodicity), abs=0.011)
+    assert restored.to_dict() == IncrementalForecaster(periodicity).update(serie).to_dict()
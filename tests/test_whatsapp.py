@@ -0,0 +1,80 @@
+import io
+
+import pandas as pd
+import pytest
+from wordcloud import WordCloud
+
+import modules.whatsapp as whatsapp
+
+stopword_list = frozenset(['the', 'and', 'de', 'que'])
+
+@pytest.fixture
+def chat(monkeypatch) -> pd.DataFrame:
+    """A small chat; the stopwords are fixed so the test does not need the NLTK corpus."""
+    monkeypatch.setattr(whatsapp, 'get_stopwords', lambda language: stopword_list)
+    return pd.DataFrame({
+        'ISSUER': ['Ana', 'Bob', 'Ana', 'Bob', 'Ana', 'Bob'],
+        'MESSAGE': [
+            "It's the cats' toy, and the cat's bowl",
+            "I'll call you at 10, 2024 was great http://example.com",
+            "Cats and dogs! Dogs bark, the dog sleeps",
+            "Qué día de café, señor. Glass glasses bus buses",
+            "ok ok ok jaja jaja x y 3rd",
+            "Ok, it's fine. You're right, we'll see",
+        ],
+    })
+
+@pytest.mark.parametrize('issuer', ['Ana', 'Bob', 'GENERAL'])
+def test_word_frequencies_match_wordcloud(chat, issuer):
+    data = chat if issuer == 'GENERAL' else chat[chat['ISSUER'] == issuer]
+    expected = WordCloud(collocations=False).process_text(whatsapp.text_normalizer(data, 'english'))
+    assert dict(whatsapp.build_word_frequencies(chat, 'english')[issuer]) == expected
+
+def parse(text : str) -> pd.DataFrame:
+    return whatsapp.preprocess_whatsapp_data(io.BytesIO(text.encode('utf-8')))
+
+def test_twelve_hour_chat_is_kept_in_order():
+    chat = parse(
+        "5/1/24, 11:50 a. m. - Ana: hola\n"
+        "5/1/24, 12:05 p. m. - Bob: hey\n"
+        "5/1/24, 1:15 p. m. - Ana: que tal\n"
+        "6/1/24, 12:10 AM - Bob: tarde\n")
+    assert chat['MESSAGE'].tolist() == ['hola', 'hey', 'que tal', 'tarde']
+    assert chat['HOUR'].tolist() == [11, 12, 13, 0]
+    assert chat.index[2] == pd.Timestamp('2024-01-05 13:15')
+    latency = whatsapp.response_latency(chat).set_index('ISSUER')
+    assert latency.loc['Ana', 'MEDIAN_MINUTES'] == 70
+    assert latency.loc['Bob', 'MEDIAN_MINUTES'] == (15 + 655) / 2
+
+def test_month_first_chat_is_parsed():
+    chat = parse(
+        "12/30/23, 23:55 - Ana: hi\n"
+        "12/31/23, 11:00 - Bob: yo\n"
+        "1/2/24, 9:05 - Ana: happy new year\n")
+    assert chat.index.tolist() == [pd.Timestamp('2023-12-30 23:55'), pd.Timestamp('2023-12-31 11:00'), 
+                                   pd.Timestamp('2024-01-02 09:05')]
+    assert chat['month'].tolist() == [12, 12, 1]
+
+def test_day_first_is_kept_when_the_dates_do_not_tell():
+    assert whatsapp.infer_date_format(['1/2/24', '12/11/24']) == '%d/%m/%y'
+    assert whatsapp.infer_date_format(['31/12/2023', '1/1/2024']) == '%d/%m/%Y'
+    assert whatsapp.infer_date_format(['12/31/2023']) == '%m/%d/%Y'
+
+def sample_chat(messages : int = 300) -> str:
+    lines = []
+    for i in range(messages):
+        text = f'mensaje {i} con café ☕' if i % 3 else f'línea {i}\nsegunda línea\n\ntercera línea'
+        lines.append(f'{i % 28 + 1}/2/24, {i % 24}:{i % 60:02d} - {"Ana" if i % 2 else "Bob"}: {text}')
+    return '\n'.join(lines) + '\n'
+
+@pytest.mark.parametrize('newline, chunk_size, bom', [('\n', 1000, b''), ('\r\n', 997, b''), ('\n', 1001, b'\xef\xbb\xbf')])
+def test_chunked_parsing_matches_a_single_pass(newline, chunk_size, bom):
+    text = sample_chat()
+    data = bom + text.replace('\n', newline).encode('utf-8')
+    batches = list(whatsapp.iter_message_batches(io.BytesIO(data), chunk_size=chunk_size))
+    assert len(batches) > 1
+    chunked = pd.concat(batches, ignore_index=True)
+    expected = whatsapp.parse_messages(text)
+    pd.testing.assert_frame_equal(chunked, expected)
+    assert len(chunked) == 300 and chunked['ISSUER'].iloc[0] == 'Bob'
+    assert chunked['MESSAGE'].iloc[0] == 'línea 0 segunda línea  tercera línea'
@@ -0,0 +1,34 @@
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from modules.world_bank import stream_export
+
+def block(rows : list) -> pd.DataFrame:
+    """Builds an export block shaped like the ones of 'iter_export_frames'."""
+    return pd.DataFrame(rows, columns=['COUNTRY', 'DATE', 'VALUE']).astype({'COUNTRY': str, 'DATE': str, 'VALUE': float})
+
+def read_parquet(frames : list) -> pd.DataFrame:
+    return pq.read_table(io.BytesIO(b''.join(stream_export(iter(frames), format='parquet')))).to_pandas()
+
+def test_parquet_export_with_empty_first_block():
+    frames = [block([]), block([('Argentina', '2020', 45000000.0), ('Argentina', '2019', None)]), block([])]
+    table = read_parquet(frames)
+    assert table['COUNTRY'].tolist() == ['Argentina', 'Argentina']
+    assert table['DATE'].tolist() == ['2020', '2019']
+    assert table['VALUE'].iloc[0] == 45000000.0 and pd.isna(table['VALUE'].iloc[1])
+
+def test_parquet_export_without_rows_is_a_valid_file():
+    assert read_parquet([]).columns.tolist() == ['COUNTRY', 'DATE', 'VALUE']
+    assert read_parquet([block([])]).empty
+
+def test_parquet_export_keeps_the_indicator_column():
+    frame = block([('Chile', '2021', 1.5)])
+    frame.insert(0, 'INDICATOR', 'SP.POP.TOTL')
+    assert read_parquet([frame])['INDICATOR'].tolist() == ['SP.POP.TOTL']
+
+def test_csv_export_writes_integral_values_without_decimals():
+    frames = [block([('Argentina', '2020', 45000000.0), ('Argentina', '2019', 2.5), ('Argentina', '2018', None)])]
+    csv = b''.join(stream_export(iter(frames), format='csv')).decode('utf-8')
+    assert csv.splitlines() == ['COUNTRY,DATE,VALUE', 'Argentina,2020,45000000', 'Argentina,2019,2.5', 'Argentina,2018,']
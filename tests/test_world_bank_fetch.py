@@ -0,0 +1,73 @@
+import json, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from modules.world_bank import create_session, fetch_country_data_for_indicator, fetch_indicators
+
+def entry(country, date, value):
+    return {'country': {'id': country[:2].upper(), 'value': country}, 'countryiso3code': country[:3].upper(),
+            'date': date, 'value': value}
+
+class StubHandler(BaseHTTPRequestHandler):
+    """World Bank API stub: PAGED spans two pages, FLAKY fails once with a 503, DOWN always fails."""
+
+    requests = {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        indicator_id = url.path.rsplit('/', 1)[-1]
+        page = int(parse_qs(url.query)['page'][0])
+        calls = self.requests[indicator_id] = self.requests.get(indicator_id, 0) + 1
+
+        if indicator_id == 'DOWN' or (indicator_id == 'FLAKY' and calls == 1):
+            self.send_response(503)
+            self.end_headers()
+            return
+        if indicator_id == 'PAGED':
+            rows = [entry('Spain', '2020', 1.0), entry('World', '2020', 9.0)] if page == 1 else \
+                   [entry('France', '2020', 2.0), entry('Chile', '2020', None)]
+            body = [{'page': page, 'pages': 2}, rows]
+        else:
+            body = [{'page': 1, 'pages': 1}, [entry('Peru', '2021', 3.0)]]
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def base_url():
+    StubHandler.requests = {}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def http_session():
+    return create_session(pool_size=2, retries=2, backoff_factor=0)
+
+def test_every_page_is_fetched_and_filtered(base_url, http_session):
+    data = fetch_country_data_for_indicator('PAGED', http_session, base_url)
+    # 'World' is an excluded aggregate and Chile has no value
+    assert [(row['country']['value'], row['value']) for row in data] == [('Spain', 1.0), ('France', 2.0)]
+    assert StubHandler.requests['PAGED'] == 2
+
+def test_unavailable_response_is_retried(base_url, http_session):
+    data = fetch_country_data_for_indicator('FLAKY', http_session, base_url)
+    assert [row['country']['value'] for row in data] == ['Peru']
+    assert StubHandler.requests['FLAKY'] == 2
+
+def test_permanent_failure_returns_none(base_url, http_session):
+    results = fetch_indicators(['DOWN', 'PAGED'], http_session=http_session, base_url=base_url)
+    assert results['DOWN'] is None
+    assert len(results['PAGED']) == 2
+    assert StubHandler.requests['DOWN'] == 3  # First try and two retries